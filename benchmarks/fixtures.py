@@ -0,0 +1,188 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import rasterio
+from rasterio.transform import from_origin
+from shapely.geometry import Polygon
+from core.config import AppConfig
+from data.influx_manager import empty_frame
+from data.station_registry import StationRegistry
+from data.sql_manager import DatabaseOperations
+
+# Synthetic fixtures cover roughly the Czech Republic (lon, lat)
+LON_RANGE = (12.0, 19.0)
+LAT_RANGE = (48.5, 51.1)
+DEM_RESOLUTION = 0.0025  # degrees, about 200 m
+
+
+def synthetic_country(seed=0, n_vertices=48):
+    """
+    Returns an irregular country polygon as GeoDataFrame in EPSG:3857
+    (the CRS initialize() uses for czech_rep).
+    """
+    rng = np.random.default_rng(seed)
+    angles = np.linspace(0, 2 * np.pi, n_vertices, endpoint=False)
+    radius = 1 + 0.15 * np.sin(3 * angles) + rng.uniform(-0.05, 0.05, n_vertices)
+    cx, cy = np.mean(LON_RANGE), np.mean(LAT_RANGE)
+    rx = (LON_RANGE[1] - LON_RANGE[0]) / 2 * 0.85
+    ry = (LAT_RANGE[1] - LAT_RANGE[0]) / 2 * 0.85
+    poly = Polygon(np.c_[cx + rx * radius * np.cos(angles), cy + ry * radius * np.sin(angles)])
+    return gpd.GeoDataFrame(geometry=[poly], crs="EPSG:4326").to_crs("EPSG:3857")
+
+
+def synthetic_dem(path, seed=0, resolution=DEM_RESOLUTION, margin=0.5):
+    """
+    Writes a smooth synthetic terrain GeoTIFF (int16, EPSG:4326, nodata -32768)
+    covering the fixture area plus margin degrees. Returns path.
+    """
+    rng = np.random.default_rng(seed)
+    west, north = LON_RANGE[0] - margin, LAT_RANGE[1] + margin
+    width = int(round((LON_RANGE[1] - LON_RANGE[0] + 2 * margin) / resolution))
+    height = int(round((LAT_RANGE[1] - LAT_RANGE[0] + 2 * margin) / resolution))
+    lon = west + (np.arange(width) + 0.5) * resolution
+    lat = north - (np.arange(height) + 0.5) * resolution
+    lon, lat = np.meshgrid(lon, lat)
+
+    elevation = np.full(lon.shape, 300.0)
+    for _ in range(12):
+        x0 = rng.uniform(*LON_RANGE)
+        y0 = rng.uniform(*LAT_RANGE)
+        h = rng.uniform(200, 1200)
+        s = rng.uniform(0.2, 0.8)
+        elevation += h * np.exp(-((lon - x0) ** 2 + (lat - y0) ** 2) / (2 * s ** 2))
+    elevation += 30 * np.sin(lon * 25) * np.cos(lat * 25)
+    data = elevation.astype(np.int16)
+    data[:5, :5] = -32768  # some nodata
+
+    with rasterio.open(
+        path, "w", driver="GTiff", height=height, width=width, count=1, dtype="int16",
+        crs="EPSG:4326", transform=from_origin(west, north, resolution, resolution),
+        nodata=-32768,
+    ) as dst:
+        dst.write(data, 1)
+    return path
+
+
+def synthetic_stations(n_stations, seed=0):
+    """
+    Returns station metadata (index station_id; lon, lat, elev) like the station registry.
+    """
+    rng = np.random.default_rng(seed)
+    ids = [f"BENCH{i:05d}" for i in range(n_stations)]
+    return pd.DataFrame(
+        {
+            "lon": rng.uniform(LON_RANGE[0] + 0.3, LON_RANGE[1] - 0.3, n_stations),
+            "lat": rng.uniform(LAT_RANGE[0] + 0.2, LAT_RANGE[1] - 0.2, n_stations),
+            "elev": rng.uniform(150, 1400, n_stations),
+        },
+        index=pd.Index(ids, dtype=object, name="station_id"),
+    )
+
+
+class StaticInfluxSource:
+    """
+    Stand-in for InfluxSource: deterministic 10-minute observations of the
+    given stations (temperature decreasing with elevation, daily cycle, noise).
+    """
+
+    def __init__(self, stations, seed=0, window_minutes=10):
+        self.stations = stations
+        self.seed = seed
+        self.window = pd.Timedelta(minutes=window_minutes)
+        self.calls = 0
+
+    def get_data(self, start_time, end_time):
+        """
+        Returns rows with Time in (start_time, end_time] like InfluxSource.get_data.
+        """
+        self.calls += 1
+        start = pd.Timestamp(start_time).tz_convert("UTC")
+        end = pd.Timestamp(end_time).tz_convert("UTC")
+        times = pd.date_range(start.floor(self.window) + self.window, end, freq=self.window)
+        if len(times) == 0:
+            return empty_frame()
+
+        n = len(self.stations)
+        rng = np.random.default_rng([self.seed, int(start.timestamp())])
+        hours = times.hour.to_numpy() + times.minute.to_numpy() / 60
+        base = 12 - 0.0065 * self.stations["elev"].to_numpy()
+        temperature = (
+            base[None, :]
+            + 5 * np.sin((hours[:, None] - 9) / 24 * 2 * np.pi)
+            + rng.normal(0, 0.8, (len(times), n))
+        )
+        return pd.DataFrame(
+            {
+                "Time": np.repeat(times, n),
+                "Temperature": temperature.ravel(),
+                "ID": pd.Categorical(np.tile(self.stations.index.to_numpy(), len(times))),
+            }
+        )
+
+    def close(self):
+        pass
+
+
+def static_db_ops(stations):
+    """
+    Returns DatabaseOperations backed by a station registry prefilled with
+    stations; MySQL is never contacted.
+    """
+    registry = StationRegistry(engine=None, ttl_seconds=10 ** 9, miss_refresh_seconds=10 ** 9)
+    registry.table = stations.copy()
+    registry.loaded_at = registry._last_attempt = pd.Timestamp.now().timestamp()
+    return DatabaseOperations(None, registry)
+
+
+def benchmark_config(work_dir, overrides=None):
+    """
+    Creates a config directory in work_dir from configs/*.ini.dist with paths
+    inside work_dir and the given overrides {"file.ini": {"section": {key: value}}}.
+    Returns AppConfig.
+    """
+    import configparser
+
+    repo_configs = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "configs")
+    config_dir = os.path.join(work_dir, "configs")
+    os.makedirs(config_dir, exist_ok=True)
+    defaults = {
+        "app.ini": {
+            "logging": {"backend_log": os.path.join(work_dir, "bench.log")},
+            "paths": {
+                "dem_tif": os.path.join(work_dir, "dem.tif"),
+                "images_dir": os.path.join(work_dir, "outputs_web"),
+                "saved_grids_dir": os.path.join(work_dir, "saved_grids"),
+                "cache_dir": os.path.join(work_dir, "cache"),
+                "tiles_dir": os.path.join(work_dir, "tiles"),
+            },
+            "output": {"manifest": "false"},
+            "metrics": {
+                "json_file": os.path.join(work_dir, "metrics.jsonl"),
+                "prometheus_file": "",
+            },
+        },
+        "database.ini": {"influx": {"cache": "false"}},
+        "compute.ini": {},
+    }
+    for name in ("app.ini", "database.ini", "compute.ini"):
+        cfg = configparser.ConfigParser(interpolation=None)
+        cfg.read(os.path.join(repo_configs, f"{name}.dist"), encoding="utf-8")
+        for layer in (defaults[name], (overrides or {}).get(name, {})):
+            for section, values in layer.items():
+                if not cfg.has_section(section):
+                    cfg.add_section(section)
+                for key, value in values.items():
+                    cfg.set(section, key, str(value))
+        with open(os.path.join(config_dir, name), "w", encoding="utf-8") as f:
+            cfg.write(f)
+    return AppConfig(config_dir)
+
+
+def reset_dir(path):
+    """
+    Removes and recreates a directory.
+    """
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
@@ -0,0 +1,239 @@
+"""
+Offline benchmarks of the hourly pipeline on synthetic fixtures.
+
+Usage (from the repository root):
+    python -m benchmarks.run_benchmarks --stations 50,500 --grids 200,500 \
+        --models linear,random_forest --output benchmark_results.json
+
+Influx and MySQL are replaced by local stand-ins (benchmarks/fixtures.py),
+so no network access is needed. Results are written as JSON for comparison
+between commits.
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import numpy as np
+
+
+def measure(fn, repeat, warmup=1):
+    """
+    Runs fn warmup times untimed (imports, first-use caches), then repeat
+    times timed. Returns the list of durations in seconds and the last result.
+    """
+    for _ in range(warmup):
+        fn()
+    times = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return times, result
+
+
+def summarize(name, params, times, **extra):
+    """
+    Builds one result record.
+    """
+    record = {
+        "name": name,
+        "params": params,
+        "times": [round(t, 6) for t in times],
+        "median": round(float(np.median(times)), 6),
+        "min": round(float(np.min(times)), 6),
+    }
+    record.update(extra)
+    print(f"{name:<24} {json.dumps(params):<70} median {record['median']:.4f}s")
+    return record
+
+
+def git_commit():
+    """
+    Returns the current git commit, or None outside a git checkout.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run(args):
+    """
+    Runs all benchmarks and returns the results document.
+    """
+    from benchmarks import fixtures
+    from geo.geographical_processing import GeographicalProcessing
+    from geo.prediction_grid import PredictionGrid
+    from geo.interpolation import spatial_interpolation, NeighbourCacheKriging
+    from visualization.visualization import map_plotting
+    from data.data_processing import DataProcessor
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="telcotemp_bench_")
+    fixtures.reset_dir(work_dir)
+    logger = logging.getLogger("backend_logger")
+    logger.setLevel(logging.WARNING)
+
+    rep = fixtures.synthetic_country(args.seed)
+    fixtures.synthetic_dem(os.path.join(work_dir, "dem.tif"), args.seed)
+    results = []
+
+    for grid_size in args.grids:
+        for renderer in args.renderers:
+            config = fixtures.benchmark_config(work_dir, {
+                "compute.ini": {"grid": {"x_points": grid_size, "y_points": grid_size}},
+                "app.ini": {"visualization": {"renderer": renderer}},
+            })
+            geo_proc = GeographicalProcessing()
+            elevation_data, transform_matrix, crs = geo_proc.load_elevation_data(
+                config.get_paths()["dem_tif"], bounds=rep.total_bounds, bounds_crs=rep.crs,
+                dtype="float32",
+            )
+            params = {"grid": grid_size}
+            itp = config.get_interpolation_config()
+
+            if renderer == args.renderers[0]:
+                grid_x, grid_y = np.mgrid[
+                    rep.total_bounds[0]:rep.total_bounds[2]:complex(grid_size),
+                    rep.total_bounds[1]:rep.total_bounds[3]:complex(grid_size),
+                ]
+                # A fresh instance per call: no in-memory mask cache, no cache_dir
+                times, _ = measure(
+                    lambda: GeographicalProcessing().create_mask(rep, grid_x, grid_y), args.repeat
+                )
+                results.append(summarize("create_mask", params, times))
+                times, prediction_grid = measure(
+                    lambda: PredictionGrid(
+                        rep, geo_proc, elevation_data, transform_matrix, crs, grid_size, grid_size,
+                        covariates=itp["covariates"], tpi_radius=itp["tpi_radius"],
+                    ),
+                    args.repeat,
+                )
+                results.append(summarize("prediction_grid", params, times))
+            else:
+                prediction_grid = PredictionGrid(
+                    rep, geo_proc, elevation_data, transform_matrix, crs, grid_size, grid_size,
+                    covariates=itp["covariates"], tpi_radius=itp["tpi_radius"],
+                )
+
+            for n_stations in args.stations:
+                stations = fixtures.synthetic_stations(n_stations, args.seed)
+                source = fixtures.StaticInfluxSource(stations, args.seed)
+                db_ops = fixtures.static_db_ops(stations)
+                hour = datetime.datetime(2024, 7, 1, 12, tzinfo=datetime.timezone.utc)
+                raw = source.get_data(hour - datetime.timedelta(hours=1), hour)
+                sp = dict(params, stations=n_stations)
+
+                if grid_size == args.grids[0] and renderer == args.renderers[0]:
+                    times, _ = measure(lambda: db_ops.get_metadata(raw.copy()), args.repeat)
+                    results.append(summarize("get_metadata", dict(stations=n_stations, rows=len(raw)), times))
+
+                processor = DataProcessor(
+                    config, db_ops, geo_proc, rep, elevation_data, transform_matrix, crs,
+                    logger, prediction_grid=prediction_grid, influx_source=source, force=True,
+                )
+                df = processor._reduce_per_station(processor._prepare_data(raw.copy()))
+                processor._transform_coordinates(df)
+
+                if renderer == args.renderers[0]:
+                    for model in args.models:
+                        for backend in args.backends:
+                            # A fresh backend per call: neighbour and weight caches start cold
+                            times, grid = measure(
+                                lambda: spatial_interpolation(
+                                    df, rep, geo_proc, elevation_data, transform_matrix, crs,
+                                    regression_model_type=model, prediction_grid=prediction_grid,
+                                    kriging_backend=(
+                                        NeighbourCacheKriging() if backend == "neighbour_cache" else None
+                                    ),
+                                    chunk_size=config.get_grid_config()["predict_chunk_size"],
+                                    n_jobs=itp["n_jobs"],
+                                ),
+                                args.repeat,
+                            )
+                            results.append(summarize(
+                                "spatial_interpolation", dict(sp, model=model, backend=backend), times
+                            ))
+                else:
+                    grid = spatial_interpolation(
+                        df, rep, geo_proc, elevation_data, transform_matrix, crs,
+                        prediction_grid=prediction_grid,
+                    )
+
+                if n_stations == args.stations[0]:
+                    times, _ = measure(
+                        lambda: map_plotting(*grid, rep, "bench.png", config), args.repeat
+                    )
+                    results.append(summarize("map_plotting", dict(params, renderer=renderer), times))
+
+                # End-to-end hour with per-stage metrics from the pipeline itself
+                metrics_file = config.get_metrics_config()["json_file"]
+                if os.path.exists(metrics_file):
+                    os.remove(metrics_file)
+                times, _ = measure(
+                    lambda: processor.process_time_range(hour, hour + datetime.timedelta(hours=1)),
+                    args.repeat,
+                )
+                with open(metrics_file, encoding="utf-8") as f:
+                    stages = json.loads(f.readlines()[-1])["stages"]
+                results.append(summarize(
+                    "end_to_end_hour", dict(sp, renderer=renderer), times, stages=stages
+                ))
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k != "output"},
+        },
+        "results": results,
+    }
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(",") if v]
+
+
+def _str_list(value):
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run offline pipeline benchmarks.")
+    parser.add_argument("--stations", type=_int_list, default=[50, 500, 2000],
+                        help="Comma-separated station counts (50 - 10000).")
+    parser.add_argument("--grids", type=_int_list, default=[200, 500],
+                        help="Comma-separated grid sizes (points per axis).")
+    parser.add_argument("--models", type=_str_list, default=["linear", "random_forest"],
+                        help="Comma-separated regression models.")
+    parser.add_argument("--backends", type=_str_list, default=["pykrige", "neighbour_cache"],
+                        help="Comma-separated kriging backends.")
+    parser.add_argument("--renderers", type=_str_list, default=["fast", "matplotlib"],
+                        help="Comma-separated renderers for map_plotting and end-to-end hours.")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per benchmark.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic fixtures.")
+    parser.add_argument("--work_dir", type=str, help="Directory for fixtures and outputs (default: temp).")
+    parser.add_argument("--output", type=str, default="benchmark_results.json",
+                        help="JSON file for the results.")
+    args = parser.parse_args()
+    if any(n < 3 or n > 10000 for n in args.stations):
+        parser.error("--stations must be between 3 and 10000.")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1.")
+
+    document = run(args)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+    print(f"Results written to {args.output}")
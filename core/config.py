@@ -1,11 +1,48 @@
 import os
+import ast
 import configparser
+from dataclasses import dataclass, fields
+from types import MappingProxyType
+from typing import Mapping
+
+VARIOGRAM_MODELS = ("linear", "power", "gaussian", "spherical", "exponential", "hole-effect")
+REGRESSION_MODELS = ("linear", "random_forest", "gradient_boosting", "svr")
+COVARIATES = ("elevation", "lat", "lon", "slope", "northness", "eastness", "tpi")
+
+
+def _flag(value):
+    """
+    Parses a boolean option value from a section or a plain dict.
+    """
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """
+    Immutable, validated configuration: one read-only mapping per section.
+    Built once by AppConfig, so hourly code does not re-parse .ini values.
+    """
+
+    logging: Mapping
+    paths: Mapping
+    visualization: Mapping
+    output: Mapping
+    metrics: Mapping
+    mysql: Mapping
+    influx: Mapping
+    grid: Mapping
+    interpolation: Mapping
+    location: Mapping
+    pipeline: Mapping
+    dem: Mapping
 
 
 class AppConfig:
     """
     Loads and provides access to application, database, and compute configuration.
-    Reads .ini files from the configs/ directory.
+    Reads .ini files from the configs/ directory, parses and validates them once
+    into a frozen ConfigSnapshot; getters return its read-only sections.
     """
 
     def __init__(self, config_dir="configs"):
@@ -13,6 +50,7 @@ class AppConfig:
         self.app = self._load("app.ini")
         self.database = self._load("database.ini")
         self.compute = self._load("compute.ini")
+        self.snapshot = self._build_snapshot()
 
     def _load(self, filename):
         """
@@ -25,10 +63,90 @@ class AppConfig:
         cfg.read(path, encoding="utf-8")
         return cfg
 
+    def _build_snapshot(self):
+        """
+        Parses all sections, validates them and freezes the result.
+        Raises ValueError for invalid values.
+        """
+        sections = {f.name: getattr(self, f"_parse_{f.name}")() for f in fields(ConfigSnapshot)}
+        self._validate(sections)
+        return ConfigSnapshot(**{k: MappingProxyType(v) for k, v in sections.items()})
+
+    @staticmethod
+    def _validate(sections):
+        """
+        Checks option values that would otherwise fail only when first used.
+        """
+        def check(ok, section, key):
+            if not ok:
+                raise ValueError(
+                    f"Invalid configuration: [{section}] {key}={sections[section][key]!r}"
+                )
+
+        grid = sections["grid"]
+        check(grid["x_points"] >= 2, "grid", "x_points")
+        check(grid["y_points"] >= 2, "grid", "y_points")
+        check(grid["predict_chunk_size"] >= 0, "grid", "predict_chunk_size")
+        check(grid["coarse_factor"] >= 1, "grid", "coarse_factor")
+
+        itp = sections["interpolation"]
+        check(itp["variogram_model"] in VARIOGRAM_MODELS, "interpolation", "variogram_model")
+        check(itp["regression_model"] in REGRESSION_MODELS, "interpolation", "regression_model")
+        check(itp["station_aggregation"] in ("mean", "last", "time_weighted"),
+              "interpolation", "station_aggregation")
+        check(itp["kriging_backend"] in ("pykrige", "neighbour_cache"),
+              "interpolation", "kriging_backend")
+        check(itp["variogram_cache"] in ("off", "hour_of_day", "rolling"),
+              "interpolation", "variogram_cache")
+        check(itp["batch_hours"] >= 1, "interpolation", "batch_hours")
+        if itp["batch_hours"] > 1 and itp["kriging_backend"] != "neighbour_cache":
+            raise ValueError(
+                "Invalid configuration: [interpolation] batch_hours > 1 needs "
+                "kriging_backend=neighbour_cache (batch kriging has no pykrige variant)."
+            )
+        check(itp["nlags"] >= 1, "interpolation", "nlags")
+        check(itp["covariates"] and all(c in COVARIATES for c in itp["covariates"]),
+              "interpolation", "covariates")
+        check(len(set(itp["covariates"])) == len(itp["covariates"]), "interpolation", "covariates")
+        check(itp["tpi_radius"] >= 1, "interpolation", "tpi_radius")
+        check(itp["n_jobs"] != 0, "interpolation", "n_jobs")
+
+        vis = sections["visualization"]
+        check(vis["n_levels"] >= 1, "visualization", "n_levels")
+        check(vis["renderer"] in ("fast", "matplotlib"), "visualization", "renderer")
+        check(vis["renderer"] != "fast" or vis["n_levels"] <= 255, "visualization", "n_levels")
+        check(vis["png_scale"] >= 1, "visualization", "png_scale")
+
+        dem = sections["dem"]
+        check(dem["dtype"] in ("float32", "float64"), "dem", "dtype")
+        check(dem["downscale"] >= 1, "dem", "downscale")
+        check(dem["margin"] >= 0, "dem", "margin")
+
+        influx = sections["influx"]
+        check(influx["circuit_open_seconds"] >= 0, "influx", "circuit_open_seconds")
+
+        out = sections["output"]
+        check(out["grid_dtype"] in ("float32", "float16"), "output", "grid_dtype")
+        check(0 <= out["tile_min_zoom"] <= out["tile_max_zoom"] <= 22, "output", "tile_max_zoom")
+
+    @staticmethod
+    def _parse_colormap(value):
+        """
+        Parses the colormap option, a Python literal list of (position, color)
+        pairs, without evaluating code. Returns a tuple of pairs.
+        """
+        if not value or not value.strip():
+            return ()
+        try:
+            colormap = ast.literal_eval(value)
+            return tuple((float(pos), str(color)) for pos, color in colormap)
+        except (ValueError, TypeError, SyntaxError) as e:
+            raise ValueError(f"Invalid configuration: [visualization] colormap: {e}") from e
+
     # --- APP ---
-    def get_logging_config(self):
+    def _parse_logging(self):
         """
-        Returns logging configuration as a dictionary.
+        Parses logging configuration as a dictionary.
         """
         lg = self.app["logging"]
         return {
@@ -39,9 +157,9 @@ class AppConfig:
             "fmt": lg.get("fmt", raw=True, fallback="%(asctime)s -%(funcName)s - %(levelname)s - %(message)s"),
         }
 
-    def get_paths(self):
+    def _parse_paths(self):
         """
-        Returns paths configuration as a dictionary.
+        Parses paths configuration as a dictionary.
         """
         p = self.app["paths"]
         return {
@@ -49,35 +167,66 @@ class AppConfig:
             "dem_tif": p.get("dem_tif"),
             "images_dir": p.get("images_dir", "images"),
             "saved_grids_dir": p.get("saved_grids_dir", "saved_grids"),
+            "cache_dir": p.get("cache_dir", "cache"),
+            "tiles_dir": p.get("tiles_dir", "tiles"),
         }
 
-    def get_visualization(self):
+    def _parse_visualization(self):
         """
-        Returns visualization configuration as a dictionary.
+        Parses visualization configuration as a dictionary.
         """
         vis = self.app["visualization"] if "visualization" in self.app else {}
         colormap = vis.get("colormap", "[]")
         return {
             "n_levels": int(vis.get("n_levels", "15")),
-            "colormap": eval(colormap) if colormap else [],
+            "colormap": self._parse_colormap(colormap),
+            "renderer": vis.get("renderer", "matplotlib"),
+            "png_scale": int(vis.get("png_scale", "1")),
+        }
+
+    def _parse_output(self):
+        """
+        Parses output configuration as a dictionary.
+        """
+        out = self.app["output"] if "output" in self.app else {}
+        return {
+            "save_grids": _flag(out.get("save_grids", "true")),
+            "grid_dtype": out.get("grid_dtype", "float32"),
+            "manifest": _flag(out.get("manifest", "true")),
+            "tiles": _flag(out.get("tiles", "false")),
+            "tile_min_zoom": int(out.get("tile_min_zoom", "6")),
+            "tile_max_zoom": int(out.get("tile_max_zoom", "10")),
+        }
+
+    def _parse_metrics(self):
+        """
+        Parses metrics export configuration as a dictionary.
+        """
+        m = self.app["metrics"] if "metrics" in self.app else {}
+        return {
+            "enabled": _flag(m.get("enabled", "true")),
+            "json_file": m.get("json_file", ""),
+            "prometheus_file": m.get("prometheus_file", ""),
         }
 
     # --- DATABASE ---
-    def get_mysql_config(self):
+    def _parse_mysql(self):
         """
-        Returns MySQL database configuration as a dictionary.
+        Parses MySQL database configuration as a dictionary.
         """
         mysql = self.database["mysql"]
         return {
             "user": mysql.get("user"),
             "password": mysql.get("password"),
             "host": mysql.get("host"),
-            "port": mysql.getint("port"),
+            "port": mysql.getint("port") if mysql.get("port") else None,
+            "station_ttl_seconds": mysql.getint("station_ttl_seconds", 3600),
+            "station_miss_refresh_seconds": mysql.getint("station_miss_refresh_seconds", 300),
         }
 
-    def get_influx_config(self):
+    def _parse_influx(self):
         """
-        Returns InfluxDB configuration as a dictionary.
+        Parses InfluxDB configuration as a dictionary.
         """
         influx = self.database["influx"]
         return {
@@ -85,45 +234,165 @@ class AppConfig:
             "url": influx.get("url"),
             "token": influx.get("token"),
             "bucket": influx.get("bucket"),
-            "measurements": influx.get("measurements", "").split(","),
-            "fields": influx.get("fields", "").split(","),
+            "measurements": tuple(influx.get("measurements", "").split(",")),
+            "fields": tuple(influx.get("fields", "").split(",")),
             "tag_device": influx.get("tag_device"),
             "field_temperature": influx.get("field_temperature"),
             "field_signal": influx.get("field_signal"),
             "window": influx.get("window"),
             "range": influx.get("range"),
+            "bulk_hours": influx.getint("bulk_hours", 24),
+            "timeout_ms": influx.getint("timeout_ms", 30000),
+            "pool_size": influx.getint("pool_size", 4),
+            "retries": influx.getint("retries", 3),
+            "backoff_seconds": influx.getfloat("backoff_seconds", 2.0),
+            "backoff_max_seconds": influx.getfloat("backoff_max_seconds", 30.0),
+            "hour_retries": influx.getint("hour_retries", 6),
+            "hour_retry_seconds": influx.getint("hour_retry_seconds", 300),
+            "circuit_open_seconds": influx.getfloat("circuit_open_seconds", 60.0),
+            "cache": influx.getboolean("cache", False),
+            "cache_settle_hours": influx.getfloat("cache_settle_hours", 2.0),
         }
 
     # --- COMPUTE ---
-    def get_grid_config(self):
+    def _parse_grid(self):
         """
-        Returns grid configuration for interpolation as a dictionary.
+        Parses grid configuration for interpolation as a dictionary.
         """
         g = self.compute["grid"]
         return {
             "x_points": g.getint("x_points", 500),
             "y_points": g.getint("y_points", 500),
             "mask_resolution_safe": g.getboolean("mask_resolution_safe", True),
+            "predict_chunk_size": g.getint("predict_chunk_size", 50000),
+            "coarse_factor": g.getint("coarse_factor", 1),
         }
 
-    def get_interpolation_config(self):
+    def _parse_interpolation(self):
         """
-        Returns interpolation configuration as a dictionary.
+        Parses interpolation configuration as a dictionary.
         """
         itp = self.compute["interpolation"]
         return {
             "variogram_model": itp.get("variogram_model", "spherical"),
             "nlags": itp.getint("nlags", 40),
             "regression_model": itp.get("regression_model", "linear"),
+            "station_aggregation": itp.get("station_aggregation", "mean"),
+            "kriging_backend": itp.get("kriging_backend", "pykrige"),
+            "batch_hours": itp.getint("batch_hours", 1),
+            "variogram_cache": itp.get("variogram_cache", "off"),
+            "variogram_cache_max_age_hours": itp.getfloat("variogram_cache_max_age_hours", 24),
+            "variogram_cache_min_overlap": itp.getfloat("variogram_cache_min_overlap", 0.9),
+            "covariates": tuple(
+                c.strip() for c in itp.get("covariates", "elevation").split(",") if c.strip()
+            ),
+            "tpi_radius": itp.getint("tpi_radius", 5),
+            "n_jobs": itp.getint("n_jobs", 1),
         }
 
-    def get_location(self):
+    def _parse_location(self):
         """
-        Returns location configuration as a dictionary.
+        Parses location configuration as a dictionary.
         """
         loc = self.compute["location"]
         return {
             "lat": loc.getfloat("lat", 49.8175),
             "lng": loc.getfloat("lng", 15.4730),
             "tz": loc.get("tz", "Europe/Prague"),
-        }
\ No newline at end of file
+        }
+
+    def _parse_pipeline(self):
+        """
+        Parses pipelined processing configuration as a dictionary.
+        """
+        pl = self.compute["pipeline"] if "pipeline" in self.compute else {}
+        return {
+            "enabled": _flag(pl.get("enabled", "false")),
+            "queue_size": max(1, int(pl.get("queue_size", "2"))),
+        }
+
+    def _parse_dem(self):
+        """
+        Parses DEM loading configuration as a dictionary.
+        """
+        dem = self.compute["dem"] if "dem" in self.compute else {}
+        return {
+            "crop_to_country": _flag(dem.get("crop_to_country", "true")),
+            "margin": float(dem.get("margin", "0.05")),
+            "downscale": int(dem.get("downscale", "1")),
+            "dtype": dem.get("dtype", "float64"),
+            "mmap_cache": _flag(dem.get("mmap_cache", "false")),
+        }
+
+    # --- SNAPSHOT GETTERS ---
+    def get_logging_config(self):
+        """
+        Returns logging configuration.
+        """
+        return self.snapshot.logging
+
+    def get_paths(self):
+        """
+        Returns paths configuration.
+        """
+        return self.snapshot.paths
+
+    def get_visualization(self):
+        """
+        Returns visualization configuration.
+        """
+        return self.snapshot.visualization
+
+    def get_output_config(self):
+        """
+        Returns output configuration.
+        """
+        return self.snapshot.output
+
+    def get_metrics_config(self):
+        """
+        Returns metrics export configuration.
+        """
+        return self.snapshot.metrics
+
+    def get_mysql_config(self):
+        """
+        Returns MySQL database configuration.
+        """
+        return self.snapshot.mysql
+
+    def get_influx_config(self):
+        """
+        Returns InfluxDB configuration.
+        """
+        return self.snapshot.influx
+
+    def get_grid_config(self):
+        """
+        Returns grid configuration for interpolation.
+        """
+        return self.snapshot.grid
+
+    def get_interpolation_config(self):
+        """
+        Returns interpolation configuration.
+        """
+        return self.snapshot.interpolation
+
+    def get_location(self):
+        """
+        Returns location configuration.
+        """
+        return self.snapshot.location
+
+    def get_pipeline_config(self):
+        """
+        Returns pipelined processing configuration.
+        """
+        return self.snapshot.pipeline
+
+    def get_dem_config(self):
+        """
+        Returns DEM loading configuration.
+        """
+        return self.snapshot.dem
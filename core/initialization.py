@@ -1,7 +1,12 @@
 from sqlalchemy import create_engine
 from data.sql_manager import DatabaseOperations
+from data.station_registry import StationRegistry
+from data.influx_manager import InfluxSource
+from data.influx_cache import CachedInfluxSource
 from geo.geographical_processing import GeographicalProcessing
+from geo.prediction_grid import PredictionGrid
 import datetime
+import os
 import time
 
 
@@ -21,24 +26,71 @@ def wait_for_next_hour():
 def initialize(config):
     """
     Initializes all required components for data processing:
-    - Database connection and operations
+    - Database connection and operations with preloaded station registry
+    - Persistent InfluxDB source (with daily Parquet cache if enabled)
     - Geographical processing
     - Country shape data
-    - Elevation data and transformation matrix
-    Returns tuple: (db_ops, geo_proc, czech_rep, elevation_data, transform_matrix, crs)
+    - Elevation data (cropped to the country, optionally memory-mapped) and transformation matrix
+    - Prediction grid (projected coordinates, DEM elevation, country mask, covariate stack)
+    Returns tuple: (db_ops, influx_source, geo_proc, czech_rep, elevation_data,
+    transform_matrix, crs, prediction_grid)
     """
     db_config = config.get_mysql_config()
     paths = config.get_paths()
+    grid_config = config.get_grid_config()
+    interpolation_config = config.get_interpolation_config()
 
     engine = create_engine(
         f"mysql://{db_config['user']}:{db_config['password']}@{db_config['host']}:{db_config['port']}"
     )
-    db_ops = DatabaseOperations(engine)
-    geo_proc = GeographicalProcessing()
+    station_registry = StationRegistry(
+        engine,
+        snapshot_path=os.path.join(paths["cache_dir"], "station_metadata.parquet"),
+        ttl_seconds=db_config["station_ttl_seconds"],
+        miss_refresh_seconds=db_config["station_miss_refresh_seconds"],
+    )
+    station_registry.load()
+    db_ops = DatabaseOperations(engine, station_registry)
+    influx_source = InfluxSource(config)
+    influx_config = config.get_influx_config()
+    if influx_config["cache"]:
+        influx_source = CachedInfluxSource(
+            influx_source,
+            os.path.join(paths["cache_dir"], "influx"),
+            settle_hours=influx_config["cache_settle_hours"],
+        )
+    geo_proc = GeographicalProcessing(cache_dir=paths["cache_dir"])
     state = geo_proc.load_country_data(paths["country_file"])
     czech_rep = geo_proc.json_to_geodataframe(state)
     czech_rep = czech_rep.to_crs("EPSG:3857")
+    dem_config = config.get_dem_config()
     elevation_data, transform_matrix, crs = geo_proc.load_elevation_data(
-        paths["dem_tif"]
+        paths["dem_tif"],
+        bounds=czech_rep.total_bounds if dem_config["crop_to_country"] else None,
+        bounds_crs=czech_rep.crs,
+        margin=dem_config["margin"],
+        downscale=dem_config["downscale"],
+        dtype=dem_config["dtype"],
+        mmap_cache=dem_config["mmap_cache"],
+    )
+    prediction_grid = PredictionGrid(
+        czech_rep,
+        geo_proc,
+        elevation_data,
+        transform_matrix,
+        crs,
+        x_points=grid_config["x_points"],
+        y_points=grid_config["y_points"],
+        covariates=interpolation_config["covariates"],
+        tpi_radius=interpolation_config["tpi_radius"],
+    )
+    return (
+        db_ops,
+        influx_source,
+        geo_proc,
+        czech_rep,
+        elevation_data,
+        transform_matrix,
+        crs,
+        prediction_grid,
     )
-    return db_ops, geo_proc, czech_rep, elevation_data, transform_matrix, crs
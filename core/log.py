@@ -1,5 +1,6 @@
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+from logging.handlers import QueueHandler, RotatingFileHandler
 
 
 def setup_logger(
@@ -12,18 +13,39 @@ def setup_logger(
 ):
     """
     Sets up a rotating file logger with the given parameters.
+    A handler for the same file is added only once per process.
     Returns a configured logger instance.
     """
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.propagate = False
+
+    log_path = os.path.abspath(log_file)
+    for h in logger.handlers:
+        if isinstance(h, RotatingFileHandler) and h.baseFilename == log_path:
+            return logger
+
     formatter = logging.Formatter(fmt)
     handler = RotatingFileHandler(
         log_file, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
     )
     handler.setFormatter(formatter)
+    logger.addHandler(handler)
+    return logger
+
 
+def setup_queue_logger(name, queue, level=logging.INFO):
+    """
+    Sets up a logger that only puts its records on queue, e.g. in a worker
+    process whose parent writes them with a QueueListener.
+    Returns the configured logger instance.
+    """
     logger = logging.getLogger(name)
     logger.setLevel(level)
-    logger.addHandler(handler)
     logger.propagate = False
+    for h in list(logger.handlers):
+        logger.removeHandler(h)
+    logger.addHandler(QueueHandler(queue))
     return logger
 
 
@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import logging
+import datetime
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+backend_logger = logging.getLogger("backend_logger")
+
+
+def peak_rss_bytes():
+    """
+    Returns peak resident set size of this process in bytes, or None if unknown.
+    """
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def timed(metrics, name):
+    """
+    Returns metrics.stage(name), or a no-op context when metrics is None.
+    """
+    return metrics.stage(name) if metrics is not None else nullcontext()
+
+
+class HourMetrics:
+    """
+    Stage timings (seconds) and counts collected while processing one hour.
+    """
+
+    def __init__(self, hour):
+        """
+        Starts collecting metrics for hour.
+        """
+        self.hour = hour
+        self.stages = {}
+        self.counts = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Adds the duration of the with-block to stage `name`.
+        """
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - t0
+
+    def add(self, name, seconds):
+        """
+        Adds seconds measured elsewhere to stage `name`.
+        """
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name, value):
+        """
+        Records a count, e.g. rows or stations.
+        """
+        self.counts[name] = int(value)
+
+    def as_dict(self, status):
+        """
+        Returns the metrics as a JSON-serializable dict.
+        """
+        return {
+            "hour": str(self.hour),
+            "status": status,
+            "total_seconds": round(time.perf_counter() - self._start, 4),
+            "stages": {k: round(v, 4) for k, v in self.stages.items()},
+            "counts": dict(self.counts),
+            "peak_rss_bytes": peak_rss_bytes(),
+        }
+
+
+class MetricsExporter:
+    """
+    Writes per-hour metrics to the log, to a JSON lines file and to a
+    Prometheus textfile (node_exporter textfile collector format).
+    Empty file paths disable the corresponding output. With queue set, metrics
+    are only put on the queue for another process to export (see export()).
+    """
+
+    PREFIX = "telcotemp"
+
+    def __init__(self, json_file="", prometheus_file="", queue=None):
+        """
+        Initializes the exporter with output paths or a queue.
+        """
+        self.json_file = json_file
+        self.prometheus_file = prometheus_file
+        self.queue = queue
+        self.totals = {}
+
+    def record(self, metrics, status="ok"):
+        """
+        Exports the metrics of one processed hour with its status
+        (ok, skipped, deferred, error). Failures are only logged.
+        """
+        data = metrics.as_dict(status)
+        if self.queue is not None:
+            self.queue.put(data)
+        else:
+            self.export(data)
+
+    def export(self, data):
+        """
+        Exports metrics already converted by HourMetrics.as_dict.
+        """
+        status = data["status"]
+        self.totals[status] = self.totals.get(status, 0) + 1
+        stages = ", ".join(f"{k}={v:.3f}s" for k, v in data["stages"].items())
+        counts = ", ".join(f"{k}={v}" for k, v in data["counts"].items())
+        rss = data["peak_rss_bytes"]
+        backend_logger.info(
+            f"Metrics {data['hour']} [{status}]: total={data['total_seconds']:.3f}s"
+            f"{'; ' + stages if stages else ''}{'; ' + counts if counts else ''}"
+            f"{f'; peak_rss={rss / 2 ** 20:.0f}MB' if rss else ''}"
+        )
+        try:
+            if self.json_file:
+                os.makedirs(os.path.dirname(self.json_file) or ".", exist_ok=True)
+                with open(self.json_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(data) + "\n")
+            if self.prometheus_file:
+                self._write_prometheus(data)
+        except Exception as e:
+            backend_logger.warning(f"Failed to export metrics: {e}")
+
+    def _write_prometheus(self, data):
+        """
+        Atomically rewrites the Prometheus textfile with the last hour's metrics.
+        """
+        p = self.PREFIX
+        lines = [
+            f"# HELP {p}_stage_seconds Duration of pipeline stages for the last processed hour.",
+            f"# TYPE {p}_stage_seconds gauge",
+        ]
+        lines += [f'{p}_stage_seconds{{stage="{k}"}} {v}' for k, v in data["stages"].items()]
+        lines += [
+            f"# HELP {p}_hour_total_seconds Total processing time of the last processed hour.",
+            f"# TYPE {p}_hour_total_seconds gauge",
+            f"{p}_hour_total_seconds {data['total_seconds']}",
+            f"# HELP {p}_count Row and station counts of the last processed hour.",
+            f"# TYPE {p}_count gauge",
+        ]
+        lines += [f'{p}_count{{name="{k}"}} {v}' for k, v in data["counts"].items()]
+        lines += [
+            f"# HELP {p}_hours_total Hours processed by this process, by status.",
+            f"# TYPE {p}_hours_total counter",
+        ]
+        lines += [f'{p}_hours_total{{status="{k}"}} {v}' for k, v in sorted(self.totals.items())]
+        if data["peak_rss_bytes"] is not None:
+            lines += [
+                f"# HELP {p}_peak_rss_bytes Peak RSS of the process that processed the last hour.",
+                f"# TYPE {p}_peak_rss_bytes gauge",
+                f"{p}_peak_rss_bytes {data['peak_rss_bytes']}",
+            ]
+        lines += [
+            f"# HELP {p}_last_run_timestamp_seconds Time the last hour finished.",
+            f"# TYPE {p}_last_run_timestamp_seconds gauge",
+            f"{p}_last_run_timestamp_seconds "
+            f"{datetime.datetime.now(datetime.timezone.utc).timestamp():.0f}",
+        ]
+
+        os.makedirs(os.path.dirname(self.prometheus_file) or ".", exist_ok=True)
+        tmp_path = f"{self.prometheus_file}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.prometheus_file)
@@ -0,0 +1,165 @@
+import concurrent.futures
+import datetime
+import multiprocessing
+import os
+import threading
+from logging.handlers import QueueListener
+from core.config import AppConfig
+from core.initialization import initialize
+from core.log import setup_queue_logger
+from core.metrics import MetricsExporter
+from data.data_processing import DataProcessor
+from data.influx_manager import InfluxQueryError
+
+# Per-worker DataProcessor, created once by _init_worker
+_worker_processor = None
+
+
+def _init_worker(config_dir, log_queue, metrics_queue, force=False, n_jobs=None):
+    """
+    Initializes a backfill worker process.
+    Loads configuration, DEM, country shape, mask and prediction grid once,
+    so tasks only carry the hour to process. n_jobs caps regression cores.
+    Log records go to log_queue and hour metrics to metrics_queue, both
+    written by the parent, so workers do not share its log and metrics files.
+    """
+    global _worker_processor
+    config = AppConfig(config_dir)
+    logger = setup_queue_logger(
+        "backend_logger", log_queue, level=config.get_logging_config().get("level", "INFO")
+    )
+    (
+        db_ops,
+        influx_source,
+        geo_proc,
+        czech_rep,
+        elevation_data,
+        transform_matrix,
+        crs,
+        prediction_grid,
+    ) = initialize(config)
+    _worker_processor = DataProcessor(
+        config,
+        db_ops,
+        geo_proc,
+        czech_rep,
+        elevation_data,
+        transform_matrix,
+        crs,
+        logger,
+        prediction_grid=prediction_grid,
+        influx_source=influx_source,
+        force=force,
+        n_jobs=n_jobs,
+    )
+    if _worker_processor.metrics_exporter is not None:
+        _worker_processor.metrics_exporter = MetricsExporter(queue=metrics_queue)
+
+
+def _export_metrics(metrics_queue, exporter):
+    """
+    Exports metrics sent by the workers until the None sentinel.
+    """
+    while True:
+        data = metrics_queue.get()
+        if data is None:
+            return
+        if exporter is not None:
+            exporter.export(data)
+
+
+def _worker_n_jobs(n_jobs, workers):
+    """
+    Returns regression n_jobs for one of `workers` processes: the configured
+    value capped to an equal share of the cores (negative = the whole share),
+    so the pool does not run workers x cores threads.
+    """
+    share = max(1, (os.cpu_count() or 1) // workers)
+    return share if n_jobs < 0 else min(n_jobs, share)
+
+
+def _process_hours(first_hour, last_hour, stations):
+    """
+    Processes the consecutive hours first_hour..last_hour in a worker process.
+    Returns hours deferred because InfluxDB was unavailable.
+    """
+    return _worker_processor.process_time_range(
+        first_hour, last_hour + datetime.timedelta(hours=1), stations
+    )
+
+
+def run_backfill(config, start_time, end_time, stations, workers, logger, force=False,
+                 metrics_exporter=None):
+    """
+    Processes hours in [start_time, end_time) on a pool of worker processes.
+    Hours are split into blocks of consecutive hours (at most [influx] bulk_hours
+    long) so each task can use one bulk Influx query. Errors are isolated and
+    logged per hour the same way as in DataProcessor.process_time_range.
+    With force, hours already recorded in the output manifest are recomputed.
+    Worker log records are written by logger's handlers and worker metrics by
+    metrics_exporter (None drops them), both in this process.
+    Returns hours deferred because InfluxDB was unavailable.
+    Raises InfluxQueryError, cancelling pending blocks, when Influx rejects the query.
+    """
+    hours = []
+    current_time = start_time
+    while current_time < end_time:
+        hours.append(current_time)
+        current_time += datetime.timedelta(hours=1)
+    if not hours:
+        return []
+
+    workers = max(1, min(workers, len(hours)))
+    bulk_hours = max(1, config.get_influx_config()["bulk_hours"])
+    block = max(1, min(bulk_hours, -(-len(hours) // workers)))
+    blocks = [hours[i:i + block] for i in range(0, len(hours), block)]
+    logger.info(
+        f"Backfill: {len(hours)} hours in {len(blocks)} blocks on {workers} worker processes."
+    )
+
+    # spawn: workers build their own DB engine instead of inheriting it
+    ctx = multiprocessing.get_context("spawn")
+    log_queue = ctx.Queue()
+    metrics_queue = ctx.Queue()
+    listener = QueueListener(log_queue, *logger.handlers, respect_handler_level=True)
+    metrics_thread = threading.Thread(
+        target=_export_metrics, args=(metrics_queue, metrics_exporter), daemon=True
+    )
+    listener.start()
+    metrics_thread.start()
+    try:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(
+                config.config_dir,
+                log_queue,
+                metrics_queue,
+                force,
+                _worker_n_jobs(config.get_interpolation_config()["n_jobs"], workers),
+            ),
+        ) as executor:
+            futures = {
+                executor.submit(_process_hours, b[0], b[-1], stations): b for b in blocks
+            }
+            done = 0
+            deferred = []
+            for future in concurrent.futures.as_completed(futures):
+                b = futures[future]
+                try:
+                    deferred.extend(future.result())
+                    done += len(b)
+                except InfluxQueryError as e:
+                    logger.error(f"Backfill stopped, InfluxDB rejected the query: {e}")
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+                except Exception as e:
+                    logger.error(f"Error processing hours {b[0]} - {b[-1]}: {e}")
+    finally:
+        metrics_queue.put(None)
+        metrics_thread.join()
+        listener.stop()
+
+    logger.info(f"Backfill finished: {done}/{len(hours)} hours processed.")
+    return deferred
@@ -1,6 +1,7 @@
 import datetime
 import time
 from data.data_processing import DataProcessor
+from data.backfill import run_backfill
 from core.initialization import initialize
 from core.log import setup_logger
 
@@ -11,21 +12,25 @@ class CalculationEngine:
     historical data processing, and regular hourly map generation.
     """
 
-    def __init__(self, config, logger_manager):
+    def __init__(self, config, logger_manager, force=False):
         """
         Initializes CalculationEngine with configuration and logger manager.
         Sets up database, geo processing, and data processor.
+        With force, hours already computed with the same inputs are recomputed.
         """
         self.config = config
+        self.force = force
         self.logger_manager = logger_manager
         self.backend_logger = logger_manager.get_logger("backend_logger")
         (
             self.db_ops,
+            self.influx_source,
             self.geo_proc,
             self.czech_rep,
             self.elevation_data,
             self.transform_matrix,
             self.crs,
+            self.prediction_grid,
         ) = initialize(config)
 
         self.data_processor = DataProcessor(
@@ -37,20 +42,79 @@ class CalculationEngine:
             self.transform_matrix,
             self.crs,
             self.backend_logger,
+            prediction_grid=self.prediction_grid,
+            influx_source=self.influx_source,
+            force=force,
         )
+        # Hours deferred because InfluxDB was unavailable -> number of attempts
+        self.deferred_hours = {}
 
-    def process_historical_data(self, start_time, end_time, stations=None):
+    def process_historical_data(self, start_time, end_time, stations=None, workers=1):
         """
         Processes historical data for the given time range.
-        Calls DataProcessor to generate maps for each hour in the interval.
+        Calls DataProcessor to generate maps for each hour in the interval,
+        or spreads the hours over a process pool when workers > 1.
+        Raises InfluxQueryError when the Influx query is rejected (misconfiguration).
         """
         self.backend_logger.info(
             f"Processing historical data from {start_time} to {end_time}."
         )
-        self.data_processor.process_time_range(start_time, end_time, stations)
+        if workers and workers > 1:
+            deferred = run_backfill(
+                self.config, start_time, end_time, stations, workers, self.backend_logger,
+                force=self.force,
+                metrics_exporter=self.data_processor.metrics_exporter,
+            )
+        else:
+            deferred = self.data_processor.process_time_range(
+                start_time, end_time, stations
+            )
+        if deferred:
+            self.backend_logger.warning(
+                f"{len(deferred)} hours not processed because InfluxDB was unavailable: "
+                + ", ".join(str(h) for h in sorted(deferred))
+            )
+
+    def _process_realtime_hour(self, hour, stations=None, label="hour"):
+        """
+        Processes a single hour in real-time mode.
+        Hours that failed because InfluxDB was unavailable are queued for retry.
+        """
+        try:
+            deferred = self.data_processor.process_time_range(
+                hour, hour + datetime.timedelta(hours=1), stations
+            )
+        except Exception as e:
+            self.backend_logger.error(f"Error processing {label} {hour}: {e}")
+            return
+
+        if not deferred:
+            self.deferred_hours.pop(hour, None)
+            return
+
+        attempts = self.deferred_hours.get(hour, 0) + 1
+        limit = self.config.get_influx_config()["hour_retries"]
+        if attempts > limit:
+            self.deferred_hours.pop(hour, None)
+            self.backend_logger.error(
+                f"Giving up on hour {hour} after {limit} retries, InfluxDB still unavailable."
+            )
+        else:
+            self.deferred_hours[hour] = attempts
+            self.backend_logger.warning(
+                f"Hour {hour} queued for retry ({attempts}/{limit})."
+            )
+
+    def _retry_deferred_hours(self, stations=None):
+        """
+        Retries hours previously deferred because InfluxDB was unavailable.
+        """
+        for hour in sorted(self.deferred_hours):
+            self.backend_logger.info(f"Retrying deferred hour: {hour}")
+            self._process_realtime_hour(hour, stations)
 
     def data_processing_loop(
-        self, first_run=False, start_time=None, end_time=None, stations=None
+        self, first_run=False, start_time=None, end_time=None, stations=None, workers=1
     ):
         """
         Main data processing loop.
@@ -58,13 +122,14 @@ class CalculationEngine:
         1. Regular hourly calculation: processes last complete hour, then each new hour.
         2. First run: processes last week, then switches to regular mode.
         3. Specific range: processes given interval and exits.
+        Historical ranges (modes 2 and 3) run on `workers` processes.
         """
         # Mode 3: Specific time range
         if start_time and end_time:
             self.backend_logger.info(
                 f"Processing historical time range from {start_time} to {end_time}."
             )
-            self.process_historical_data(start_time, end_time, stations)
+            self.process_historical_data(start_time, end_time, stations, workers)
             return
 
         # Determine last complete hour (data available at hh:30)
@@ -86,23 +151,16 @@ class CalculationEngine:
             self.backend_logger.info(
                 f"Processing historical range: {historical_start} to {historical_end}"
             )
-            self.process_historical_data(historical_start, historical_end, stations)
+            self.process_historical_data(
+                historical_start, historical_end, stations, workers
+            )
             self.backend_logger.info("Historical data processed. Switching to real-time mode.")
 
         # Modes 1 & 2: Regular hourly calculation
         self.backend_logger.info(
             f"Processing last complete hour immediately: {last_complete_hour}"
         )
-        try:
-            self.data_processor.process_time_range(
-                last_complete_hour,
-                last_complete_hour + datetime.timedelta(hours=1),
-                stations
-            )
-        except Exception as e:
-            self.backend_logger.error(
-                f"Error processing initial hour {last_complete_hour}: {e}"
-            )
+        self._process_realtime_hour(last_complete_hour, stations, label="initial hour")
 
         # Next map hour is the hour after last complete
         next_map_hour = last_complete_hour + datetime.timedelta(hours=1)
@@ -127,21 +185,18 @@ class CalculationEngine:
                 self.backend_logger.info(
                     f"Processing map for hour: {next_map_hour}"
                 )
-                try:
-                    self.data_processor.process_time_range(
-                        next_map_hour,
-                        next_map_hour + datetime.timedelta(hours=1),
-                        stations
-                    )
-                except Exception as e:
-                    self.backend_logger.error(
-                        f"Error processing hour {next_map_hour}: {e}"
-                    )
+                self._process_realtime_hour(next_map_hour, stations)
                 next_map_hour += datetime.timedelta(hours=1)
 
-            # Wait until next complete hour's data is available (hh:30)
+            # Wait until next complete hour's data is available (hh:30),
+            # or less when deferred hours are waiting for a retry
             wait_until = next_map_hour + datetime.timedelta(minutes=30)
             wait_seconds = (wait_until - now).total_seconds()
+            if self.deferred_hours:
+                retry_seconds = self.config.get_influx_config()["hour_retry_seconds"]
+                if retry_seconds < wait_seconds:
+                    wait_until = now + datetime.timedelta(seconds=retry_seconds)
+                    wait_seconds = retry_seconds
 
             if wait_seconds > 0:
                 self.backend_logger.info(
@@ -151,4 +206,6 @@ class CalculationEngine:
             else:
                 self.backend_logger.info(
                     f"Data for hour {next_map_hour} should already be available."
-                )
\ No newline at end of file
+                )
+
+            self._retry_deferred_hours(stations)
@@ -1,11 +1,26 @@
+import numpy as np
 import pandas as pd
-from data.influx_manager import get_data
+from data.influx_manager import InfluxSource, InfluxUnavailableError, InfluxQueryError
 import gc
+import os
 import datetime
+import math
+import time
+import queue
+import threading
 import traceback
 from pyproj import Transformer
-from geo.interpolation import spatial_interpolation
+from geo.interpolation import (
+    spatial_interpolation,
+    spatial_interpolation_batch,
+    NeighbourCacheKriging,
+)
+from geo.variogram_cache import VariogramCache
 from visualization.visualization import map_plotting
+from visualization.tiles import render_tiles
+from data.grid_store import save_grid
+from data.output_manifest import OutputManifest, input_fingerprint, config_fingerprint
+from core.metrics import HourMetrics, MetricsExporter, timed
 
 
 class DataProcessor:
@@ -24,11 +39,17 @@ class DataProcessor:
         transform_matrix,
         crs,
         logger,
+        prediction_grid=None,
+        influx_source=None,
+        force=False,
+        n_jobs=None,
     ):
         """
         Initializes the DataProcessor with configuration, database operations,
         geographical processing, country shape, elevation data, transformation matrix,
-        coordinate reference system, and logger.
+        coordinate reference system, logger, optional precomputed prediction grid
+        and InfluxDB source. With force, hours already recorded in the output
+        manifest are recomputed. n_jobs overrides [interpolation] n_jobs.
         """
         self.config = config
         self.db_ops = db_ops
@@ -38,46 +59,99 @@ class DataProcessor:
         self.transform_matrix = transform_matrix
         self.crs = crs
         self.logger = logger
+        self.prediction_grid = prediction_grid
+        self.influx_source = influx_source or InfluxSource(config)
+        interpolation_config = config.get_interpolation_config()
+        self.n_jobs = interpolation_config["n_jobs"] if n_jobs is None else n_jobs
+        self.variogram_cache = VariogramCache(
+            mode=interpolation_config["variogram_cache"],
+            max_age_hours=interpolation_config["variogram_cache_max_age_hours"],
+            min_overlap=interpolation_config["variogram_cache_min_overlap"],
+        )
+        backend = interpolation_config["kriging_backend"]
+        if backend == "neighbour_cache":
+            self.kriging_backend = NeighbourCacheKriging()
+        elif backend == "pykrige":
+            self.kriging_backend = None
+        else:
+            raise ValueError(f"Unknown kriging backend: {backend}")
+        self.force = force
+        self.manifest = None
+        if config.get_output_config()["manifest"]:
+            self.manifest = OutputManifest(
+                os.path.join(config.get_paths()["cache_dir"], "output_manifest.sqlite")
+            )
+        self.config_fp = config_fingerprint(config)
+        metrics_config = config.get_metrics_config()
+        self.metrics_exporter = MetricsExporter(
+            json_file=metrics_config["json_file"],
+            prometheus_file=metrics_config["prometheus_file"],
+        ) if metrics_config["enabled"] else None
+        self._bulk_df = None
+        self._bulk_range = None
 
     def process_time_range(self, target_time=None, end_time=None, stations=None):
         """
         Main processing loop for generating temperature maps for each hour in the given range.
         Fetches, prepares, filters, transforms, interpolates, and visualizes data.
+        With [interpolation] batch_hours > 1, consecutive hours with the same stations
+        are kriged together by spatial_interpolation_batch.
+        Per-stage timings and counts of every hour are exported by MetricsExporter.
+        With [pipeline] enabled, stages of consecutive hours overlap
+        (see _process_time_range_pipelined).
+        Returns list of hours deferred because InfluxDB was unavailable.
+        Raises InfluxQueryError (stopping the range) when Influx rejects the query.
         """
+        batch_hours = self.config.get_interpolation_config()["batch_hours"]
+        pipeline_config = self.config.get_pipeline_config()
+        if pipeline_config["enabled"] and end_time - target_time > datetime.timedelta(hours=1):
+            if batch_hours > 1:
+                self.logger.info("Pipelined processing is not used together with batch_hours > 1.")
+            else:
+                return self._process_time_range_pipelined(
+                    target_time, end_time, stations, pipeline_config["queue_size"]
+                )
         current_time = target_time
+        deferred = []
+        batch = []
 
-        while current_time < end_time: 
+        while current_time < end_time:
+            metrics = HourMetrics(current_time)
             try:
-                self.logger.info(f"Processing map for hour: {current_time}")
-                df = self._fetch_data(current_time)
-                
-                if df.empty:
-                    self.logger.warning(
-                        f"No data fetched for hour {current_time}. Skipping."
-                    )
-                    current_time += datetime.timedelta(hours=1)
-                    continue
-
-                df = self._prepare_data(df)
-                
-                if stations:
-                    df = self._filter_by_stations(df, stations)
-                    if df.empty:
-                        self.logger.warning(
-                            f"No data after station filtering for {current_time}. Skipping."
-                        )
-                        current_time += datetime.timedelta(hours=1)
-                        continue
-
-                self._transform_coordinates(df)
-                image_name, image_time = self._collect_data_summary(df)
-                
-                self._interpolate_and_visualize(df, image_name)
-
+                job = self._prepare_hour(current_time, end_time, stations, metrics)
+                if job is None:
+                    self._record_metrics(metrics, "skipped")
+                elif batch_hours > 1:
+                    if batch and (
+                        len(batch) >= batch_hours or not self._same_stations(batch[0], job)
+                    ):
+                        self._run_batch(batch)
+                        batch = []
+                    batch.append(job)
+                else:
+                    self._interpolate_and_visualize(*job[1:])
+                    self._record_metrics(metrics, "ok")
+            except InfluxUnavailableError as e:
+                self.logger.warning(
+                    f"InfluxDB unavailable for hour {current_time}, deferring: {e}"
+                )
+                deferred.append(current_time)
+                self._record_metrics(metrics, "deferred")
+            except InfluxQueryError as e:
+                self.logger.error(f"InfluxDB query failed for hour {current_time}, stopping: {e}")
+                self._record_metrics(metrics, "error")
+                # Hours already prepared are still written
+                if batch:
+                    self._run_batch(batch)
+                    batch = []
+                self._bulk_df = None
+                self._bulk_range = None
+                raise
             except Exception as e:
                 self.logger.error(
                     f"Error processing hour {current_time}: {e}\n{traceback.format_exc()}"
                 )
+                self._record_metrics(metrics, "error")
             finally:
                 current_time += datetime.timedelta(hours=1)
                 gc.collect()
@@ -87,15 +161,366 @@ class DataProcessor:
                 f"Calculation ended on {end_datetime}. Waiting for another round..."
             )
 
-    def _fetch_data(self, target_hour):
+        if batch:
+            self._run_batch(batch)
+
+        self._bulk_df = None
+        self._bulk_range = None
+        return deferred
+
+    def _process_time_range_pipelined(self, target_time, end_time, stations, queue_size):
+        """
+        Pipelined variant of process_time_range. Hours flow through three stages
+        connected by bounded queues of queue_size hours:
+        - fetch/prepare thread (Influx, MySQL metadata),
+        - interpolation thread (kriging),
+        - the calling thread, which writes grids, images and tiles.
+        While hour N is interpolated, hour N+1 is fetched and hour N-1 rendered.
+        Outputs are written in hour order and errors stay isolated per hour,
+        except InfluxQueryError, which stops fetching and is raised once the
+        hours already in flight are finished.
+        Returns list of hours deferred because InfluxDB was unavailable.
+        """
+        prepared = queue.Queue(maxsize=queue_size)
+        interpolated = queue.Queue(maxsize=queue_size)
+        done = object()
+        stop = threading.Event()
+
+        def prepare_stage():
+            current_time = target_time
+            while current_time < end_time and not stop.is_set():
+                metrics = HourMetrics(current_time)
+                try:
+                    job = self._prepare_hour(current_time, end_time, stations, metrics)
+                    prepared.put((current_time, metrics, job, None))
+                except Exception as e:
+                    if isinstance(e, InfluxQueryError):
+                        stop.set()
+                    prepared.put((current_time, metrics, None, (e, traceback.format_exc())))
+                current_time += datetime.timedelta(hours=1)
+            self._bulk_df = None
+            self._bulk_range = None
+            prepared.put(done)
+
+        def interpolate_stage():
+            while True:
+                item = prepared.get()
+                if item is done:
+                    interpolated.put(done)
+                    return
+                hour, metrics, job, error = item
+                grid = None
+                if job is not None:
+                    try:
+                        grid = self._interpolate(job[1], job[3], metrics)
+                    except Exception as e:
+                        error = (e, traceback.format_exc())
+                interpolated.put((hour, metrics, job, grid, error))
+
+        threads = [
+            threading.Thread(target=prepare_stage, name="pipeline-prepare", daemon=True),
+            threading.Thread(target=interpolate_stage, name="pipeline-interpolate", daemon=True),
+        ]
+        for t in threads:
+            t.start()
+
+        deferred = []
+        query_error = None
+        while True:
+            item = interpolated.get()
+            if item is done:
+                break
+            hour, metrics, job, grid, error = item
+            if error is not None and isinstance(error[0], InfluxQueryError):
+                self.logger.error(f"InfluxDB query failed for hour {hour}, stopping: {error[0]}")
+                self._record_metrics(metrics, "error")
+                query_error = query_error or error[0]
+                stop.set()
+            elif error is not None and isinstance(error[0], InfluxUnavailableError):
+                self.logger.warning(f"InfluxDB unavailable for hour {hour}, deferring: {error[0]}")
+                deferred.append(hour)
+                self._record_metrics(metrics, "deferred")
+            elif error is not None:
+                self.logger.error(f"Error processing hour {hour}: {error[0]}\n{error[1]}")
+                self._record_metrics(metrics, "error")
+            elif job is None:
+                self._record_metrics(metrics, "skipped")
+            else:
+                try:
+                    self._write_outputs(*grid, job[2], job[3], job[4], metrics)
+                    self._record_metrics(metrics, "ok")
+                except Exception as e:
+                    self.logger.error(
+                        f"Error processing hour {hour}: {e}\n{traceback.format_exc()}"
+                    )
+                    self._record_metrics(metrics, "error")
+            gc.collect()
+
+            end_datetime = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+            self.logger.info(
+                f"Calculation ended on {end_datetime}. Waiting for another round..."
+            )
+
+        for t in threads:
+            t.join()
+        if query_error is not None:
+            raise query_error
+        return deferred
+
+    def _record_metrics(self, metrics, status):
+        """
+        Exports metrics of a finished hour if metrics are enabled.
+        """
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.record(metrics, status)
+
+    def _prepare_hour(self, current_time, end_time, stations, metrics):
+        """
+        Fetches and prepares the data of a single hour, timing each stage in metrics.
+        Returns tuple (hour, df, image_name, image_time, input_fp, metrics), or None
+        when the hour is skipped (no data, or outputs in the manifest are up to date).
+        """
+        self.logger.info(f"Processing map for hour: {current_time}")
+        with metrics.stage("fetch"):
+            df = self._fetch_data(current_time, end_time)
+        metrics.count("rows", len(df))
+
+        if df.empty:
+            self.logger.warning(
+                f"No data fetched for hour {current_time}. Skipping."
+            )
+            return None
+
+        with metrics.stage("prepare"):
+            df = self._prepare_data(df)
+
+        if stations:
+            with metrics.stage("filter"):
+                df = self._filter_by_stations(df, stations)
+            if df.empty:
+                self.logger.warning(
+                    f"No data after station filtering for {current_time}. Skipping."
+                )
+                return None
+
+        with metrics.stage("reduce"):
+            df = self._reduce_per_station(df)
+        with metrics.stage("transform"):
+            self._transform_coordinates(df)
+        metrics.count("stations", len(df))
+        image_name, image_time = self._collect_data_summary(df)
+        with metrics.stage("manifest"):
+            input_fp = input_fingerprint(df)
+            up_to_date = (
+                self.manifest is not None
+                and not self.force
+                and self.manifest.is_current(image_time, input_fp, self.config_fp)
+            )
+        if up_to_date:
+            self.logger.info(f"Outputs for {image_time} are up to date. Skipping.")
+            return None
+        return current_time, df, image_name, image_time, input_fp, metrics
+
+    @staticmethod
+    def _same_stations(job_a, job_b):
+        """
+        Checks whether two prepared hours have the same stations at the same coordinates.
+        """
+        cols = ["ID", "Latitude", "Longitude"]
+        a = job_a[1][cols].astype({"ID": str}).sort_values("ID").to_numpy()
+        b = job_b[1][cols].astype({"ID": str}).sort_values("ID").to_numpy()
+        return a.shape == b.shape and (a == b).all()
+
+    def _run_batch(self, batch):
+        """
+        Interpolates prepared hours with identical stations and writes their outputs.
+        Hours are kriged together only when they share variogram parameters:
+        - without the variogram cache each hour fits its own variogram inside
+          the batch,
+        - with it, consecutive hours that hit the same cached entry form a batch;
+          an hour without a hit is processed alone and refreshes the cache,
+          as in hour-by-hour processing.
+        """
+        if not self.variogram_cache.enabled:
+            self._run_group(batch)
+            return
+        group, group_entry = [], None
+        for job in batch:
+            entry = self._cached_variogram(job)
+            if group and (entry is None or entry["id"] != group_entry["id"]):
+                self._run_group(group, group_entry)
+                group = []
+            if entry is None:
+                self._run_group([job])
+            else:
+                group_entry = entry
+                group.append(job)
+        if group:
+            self._run_group(group, group_entry)
+
+    def _cached_variogram(self, job):
+        """
+        Returns the variogram cache entry spatial_interpolation would reuse
+        for a prepared hour, or None when it would fit a new variogram.
+        """
+        df, image_time = job[1], job[3]
+        interpolation_config = self.config.get_interpolation_config()
+        valid = df["Longitude"].notna() & df["Latitude"].notna() & df["Temperature"].notna()
+        return self.variogram_cache.get(
+            interpolation_config["regression_model"],
+            interpolation_config["variogram_model"],
+            interpolation_config["nlags"],
+            image_time if image_time is not None else df["Time"].max(),
+            df.loc[valid, "ID"].astype(str).tolist(),
+        )
+
+    def _run_group(self, group, entry=None):
+        """
+        Interpolates hours sharing variogram entry (None = per-hour fits) in one
+        batch and writes their outputs. Falls back to hour-by-hour processing
+        when batch kriging fails; errors stay isolated per hour.
+        """
+        grid_z_cube = None
+        if len(group) > 1:
+            t0 = time.perf_counter()
+            try:
+                grid_x, grid_y, grid_z_cube = self._interpolate_batch(group, entry)
+                # Batch time is shared equally by its hours
+                share = (time.perf_counter() - t0) / len(group)
+                for job in group:
+                    job[5].add("interpolate_batch", share)
+                    job[5].count("batch_hours", len(group))
+            except Exception as e:
+                self.logger.warning(
+                    f"Batch kriging of {len(group)} hours failed, processing them one by one: {e}"
+                )
+
+        for i, (hour, df, image_name, image_time, input_fp, metrics) in enumerate(group):
+            try:
+                if grid_z_cube is None:
+                    self._interpolate_and_visualize(
+                        df, image_name, image_time, input_fp, metrics
+                    )
+                else:
+                    self._write_outputs(
+                        grid_x, grid_y, grid_z_cube[i], image_name, image_time,
+                        input_fp, metrics,
+                    )
+                self._record_metrics(metrics, "ok")
+            except Exception as e:
+                self.logger.error(
+                    f"Error processing hour {hour}: {e}\n{traceback.format_exc()}"
+                )
+                self._record_metrics(metrics, "error")
+
+    def _interpolate_batch(self, batch, entry=None):
+        """
+        Kriges prepared hours measured by the same stations with the configured
+        neighbour cache backend, using the variogram of cache entry (None = a
+        variogram fitted per hour).
+        Returns grid_x, grid_y, grid_z cube (hours first).
+        """
+        compute_config = self.config.get_grid_config()
+        interpolation_config = self.config.get_interpolation_config()
+        frames = [job[1].astype({"ID": str}).sort_values("ID") for job in batch]
+        temperatures = np.vstack([f["Temperature"].to_numpy(dtype=np.float64) for f in frames])
+
+        self.logger.info(
+            f"Batch kriging {len(batch)} hours ({batch[0][0]} - {batch[-1][0]}), "
+            f"{temperatures.shape[1]} stations."
+        )
+        if entry is not None:
+            self.logger.info(
+                f"Variogram: cached {entry['id']} (fitted for {entry['fitted_for']}) "
+                f"{entry['params']} for {len(batch)} hours"
+            )
+        return spatial_interpolation_batch(
+            frames[0],
+            temperatures,
+            self.czech_rep,
+            self.geo_proc,
+            self.elevation_data,
+            self.transform_matrix,
+            self.crs,
+            variogram_model=interpolation_config["variogram_model"],
+            nlags=interpolation_config["nlags"],
+            regression_model_type=interpolation_config["regression_model"],
+            grid_x_points=compute_config["x_points"],
+            grid_y_points=compute_config["y_points"],
+            prediction_grid=self.prediction_grid,
+            kriging_backend=self.kriging_backend,
+            variogram_parameters=entry["params"] if entry is not None else None,
+            coarse_factor=compute_config["coarse_factor"],
+            n_jobs=self.n_jobs,
+        )
+
+    def _fetch_data(self, target_hour, range_end=None):
         """
         Fetches data for the hour BEFORE target_hour.
         E.g., for target_hour 12:00, fetches data from 11:00-11:59.
+        When more hours up to range_end follow, loads up to [influx] bulk_hours
+        hours in one query and serves the following hours from memory.
         Returns a DataFrame with columns: ['Time', 'Temperature', 'ID']
         """
         data_start = target_hour - datetime.timedelta(hours=1)
         data_end = target_hour
-        return get_data(self.config, data_start, data_end)
+        bulk_hours = self.config.get_influx_config()["bulk_hours"]
+
+        if self._bulk_covers(data_start, data_end):
+            return self._slice_bulk(data_start, data_end)
+
+        remaining = 1
+        if range_end is not None:
+            remaining = math.ceil((range_end - target_hour) / datetime.timedelta(hours=1))
+        if bulk_hours <= 1 or remaining <= 1:
+            return self.influx_source.get_data(data_start, data_end)
+
+        chunk_hours = min(bulk_hours, remaining)
+        chunk_end = data_end + datetime.timedelta(hours=chunk_hours - 1)
+        self._load_bulk(data_start, chunk_end)
+        return self._slice_bulk(data_start, data_end)
+
+    def _load_bulk(self, data_start, data_end):
+        """
+        Loads data for (data_start, data_end] in a single query into a Time-indexed frame.
+        Raises InfluxUnavailableError when Influx cannot be reached.
+        """
+        self._bulk_df = None
+        self._bulk_range = None
+        self.logger.info(f"Bulk fetching data from {data_start} to {data_end}.")
+        df = self.influx_source.get_data(data_start, data_end)
+
+        df["Time"] = pd.to_datetime(df["Time"], utc=True, errors="coerce")
+        df = df.dropna(subset=["Time"]).sort_values("Time", kind="stable")
+        self._bulk_df = df.set_index("Time", drop=False)
+        self._bulk_range = (self._to_utc(data_start), self._to_utc(data_end))
+        self.logger.info(f"Bulk fetch returned {len(df)} rows.")
+
+    def _bulk_covers(self, data_start, data_end):
+        """
+        Checks whether the loaded bulk frame covers (data_start, data_end].
+        """
+        if self._bulk_range is None:
+            return False
+        bulk_start, bulk_end = self._bulk_range
+        return bulk_start <= self._to_utc(data_start) and self._to_utc(data_end) <= bulk_end
+
+    def _slice_bulk(self, data_start, data_end):
+        """
+        Returns the rows of the bulk frame with Time in (data_start, data_end],
+        matching the window timestamps of a single-hour query.
+        """
+        index = self._bulk_df.index
+        lo = index.searchsorted(self._to_utc(data_start), side="right")
+        hi = index.searchsorted(self._to_utc(data_end), side="right")
+        return self._bulk_df.iloc[lo:hi].reset_index(drop=True).copy()
+
+    @staticmethod
+    def _to_utc(value):
+        """
+        Converts a (naive local or aware) datetime to a UTC pandas Timestamp.
+        """
+        return pd.Timestamp(value.astimezone(datetime.timezone.utc))
 
     def _prepare_data(self, df):
         """
@@ -139,6 +564,64 @@ class DataProcessor:
             )
         return df
 
+    def _reduce_per_station(self, df):
+        """
+        Collapses the aggregation windows of each station to one observation,
+        so kriging gets exactly one point per station.
+        Method from [interpolation] station_aggregation:
+        - mean: mean of the windows,
+        - last: value of the latest window,
+        - time_weighted: trapezoidal time-weighted mean over the windows.
+        """
+        method = self.config.get_interpolation_config()["station_aggregation"]
+        n_rows = len(df)
+
+        df = df.dropna(subset=["Temperature"]).sort_values(["ID", "Time"], kind="stable")
+        groups = df.groupby("ID", observed=True, sort=False)
+        out = groups.agg(
+            Time=("Time", "max"),
+            Latitude=("Latitude", "first"),
+            Longitude=("Longitude", "first"),
+            Elevation=("Elevation", "first"),
+        )
+
+        if method == "mean":
+            out["Temperature"] = groups["Temperature"].mean()
+        elif method == "last":
+            out["Temperature"] = groups["Temperature"].last()
+        elif method == "time_weighted":
+            out["Temperature"] = self._time_weighted_mean(df)
+        else:
+            raise ValueError(f"Unknown station aggregation: {method}")
+
+        out = out.reset_index()[["Time", "Temperature", "ID", "Latitude", "Longitude", "Elevation"]]
+        self.logger.info(
+            f"Reduced {n_rows} rows to {len(out)} stations ({method})."
+        )
+        return out
+
+    @staticmethod
+    def _time_weighted_mean(df):
+        """
+        Trapezoidal time-weighted mean of Temperature per station.
+        df must be sorted by ID and Time. Stations with one window keep its value.
+        """
+        ids = df["ID"].to_numpy()
+        t = (df["Time"] - df["Time"].min()).dt.total_seconds().to_numpy()
+        v = df["Temperature"].to_numpy(dtype="float64")
+
+        same = ids[1:] == ids[:-1]
+        dt = np.where(same, t[1:] - t[:-1], 0.0)
+        area = dt * (v[1:] + v[:-1]) / 2.0
+        seg_id = ids[1:]
+
+        sums = pd.DataFrame({"ID": seg_id, "area": area, "dt": dt}).groupby(
+            "ID", observed=True, sort=False
+        )[["area", "dt"]].sum()
+        first = df.groupby("ID", observed=True, sort=False)["Temperature"].first()
+        weighted = sums["area"] / sums["dt"].where(sums["dt"] > 0)
+        return weighted.reindex(first.index).fillna(first)
+
     def _transform_coordinates(self, df):
         """
         Transforms coordinates to Mercator projection.
@@ -159,14 +642,26 @@ class DataProcessor:
         image_name = f"{image_hour}.png"
         return image_name, image_time
 
-    def _interpolate_and_visualize(self, df, image_name):
+    def _interpolate_and_visualize(
+        self, df, image_name, image_time=None, input_fp=None, metrics=None
+    ):
         """
         Performs spatial interpolation and generates a visualization.
         """
+        grid_x, grid_y, grid_z = self._interpolate(df, image_time, metrics)
+        self._write_outputs(
+            grid_x, grid_y, grid_z, image_name, image_time, input_fp, metrics
+        )
+
+    def _interpolate(self, df, image_time=None, metrics=None):
+        """
+        Performs spatial interpolation of one hour.
+        Returns grid_x, grid_y, grid_z.
+        """
         compute_config = self.config.get_grid_config()
         interpolation_config = self.config.get_interpolation_config()
 
-        grid_x, grid_y, grid_z = spatial_interpolation(
+        return spatial_interpolation(
             df,
             self.czech_rep,
             self.geo_proc,
@@ -178,8 +673,53 @@ class DataProcessor:
             regression_model_type=interpolation_config["regression_model"],
             grid_x_points=compute_config["x_points"],
             grid_y_points=compute_config["y_points"],
+            prediction_grid=self.prediction_grid,
+            variogram_cache=self.variogram_cache,
+            map_time=image_time,
+            kriging_backend=self.kriging_backend,
+            chunk_size=compute_config["predict_chunk_size"],
+            coarse_factor=compute_config["coarse_factor"],
+            metrics=metrics,
+            n_jobs=self.n_jobs,
         )
 
-        map_plotting(grid_x, grid_y, grid_z, self.czech_rep, image_name, self.config)
+    def _write_outputs(
+        self, grid_x, grid_y, grid_z, image_name, image_time=None, input_fp=None, metrics=None
+    ):
+        """
+        Saves the interpolated grid (if enabled), renders the map image and
+        the tile pyramid (if enabled).
+        Records the outputs in the manifest when input_fp is given.
+        """
+        output_config = self.config.get_output_config()
+        outputs = []
+        if output_config["save_grids"]:
+            with timed(metrics, "save_grid"):
+                grid_path = save_grid(
+                    self.config.get_paths()["saved_grids_dir"],
+                    os.path.splitext(image_name)[0],
+                    grid_x,
+                    grid_y,
+                    grid_z,
+                    crs=self.czech_rep.crs,
+                    map_time=image_time,
+                    dtype=output_config["grid_dtype"],
+                )
+            outputs.append(grid_path)
+
+        with timed(metrics, "render"):
+            outputs.append(
+                map_plotting(grid_x, grid_y, grid_z, self.czech_rep, image_name, self.config)
+            )
+        if output_config["tiles"]:
+            with timed(metrics, "tiles"):
+                outputs.append(
+                    render_tiles(
+                        grid_x, grid_y, grid_z, self.czech_rep.crs,
+                        os.path.splitext(image_name)[0], self.config,
+                    )
+                )
+        if self.manifest is not None and input_fp is not None and image_time is not None:
+            self.manifest.record(image_time, input_fp, self.config_fp, outputs)
 
     
\ No newline at end of file
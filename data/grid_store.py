@@ -0,0 +1,90 @@
+import os
+import json
+import logging
+import datetime
+import numpy as np
+
+backend_logger = logging.getLogger("backend_logger")
+
+GRID_DTYPES = ("float32", "float16")
+
+
+def grid_metadata(grid_x, grid_y, grid_z, crs=None, map_time=None, dtype="float32", extra=None):
+    """
+    Builds the sidecar header of a saved grid.
+    grid_z[i, j] is the value at (x_min + i * dx, y_min + j * dy); NaN = no data.
+    """
+    nx, ny = grid_z.shape
+    x_min, x_max = float(grid_x[0, 0]), float(grid_x[-1, 0])
+    y_min, y_max = float(grid_y[0, 0]), float(grid_y[0, -1])
+    meta = {
+        "format": "npy",
+        "dtype": dtype,
+        "shape": [nx, ny],
+        "layout": "grid_z[i, j] at (x_min + i * dx, y_min + j * dy)",
+        "crs": str(crs) if crs is not None else None,
+        "x_min": x_min,
+        "x_max": x_max,
+        "y_min": y_min,
+        "y_max": y_max,
+        "dx": (x_max - x_min) / (nx - 1) if nx > 1 else 0.0,
+        "dy": (y_max - y_min) / (ny - 1) if ny > 1 else 0.0,
+        "nodata": "nan",
+        "map_time": map_time.isoformat() if hasattr(map_time, "isoformat") else map_time,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+    }
+    if extra:
+        meta.update(extra)
+    return meta
+
+
+def save_grid(save_dir, name, grid_x, grid_y, grid_z, crs=None, map_time=None,
+              dtype="float32", extra=None):
+    """
+    Saves grid_z as <save_dir>/<name>.npy (dtype float32 or float16) with
+    a JSON sidecar <name>.json describing its georeference.
+    Both files are written atomically. Returns path of the .npy file.
+    """
+    if dtype not in GRID_DTYPES:
+        raise ValueError(f"Unsupported grid dtype: {dtype}")
+    os.makedirs(save_dir, exist_ok=True)
+    npy_path = os.path.join(save_dir, f"{name}.npy")
+    json_path = os.path.join(save_dir, f"{name}.json")
+    meta = grid_metadata(grid_x, grid_y, grid_z, crs, map_time, dtype, extra)
+
+    tmp_npy = f"{npy_path}.{os.getpid()}.tmp"
+    with open(tmp_npy, "wb") as f:
+        np.save(f, np.ascontiguousarray(grid_z, dtype=dtype))
+    tmp_json = f"{json_path}.{os.getpid()}.tmp"
+    with open(tmp_json, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_npy, npy_path)
+    os.replace(tmp_json, json_path)
+    backend_logger.info(f"Grid saved: {npy_path}")
+    return npy_path
+
+
+def load_grid(path, mmap=True):
+    """
+    Loads a grid saved by save_grid (path with or without .npy extension).
+    With mmap, the array is memory-mapped read-only.
+    Returns (grid_z, meta).
+    """
+    base, ext = os.path.splitext(path)
+    if ext != ".npy":
+        base = path
+    grid_z = np.load(f"{base}.npy", mmap_mode="r" if mmap else None)
+    with open(f"{base}.json", encoding="utf-8") as f:
+        meta = json.load(f)
+    return grid_z, meta
+
+
+def grid_axes(meta):
+    """
+    Returns the x and y axes of a saved grid from its sidecar header.
+    """
+    nx, ny = meta["shape"]
+    return (
+        np.linspace(meta["x_min"], meta["x_max"], nx),
+        np.linspace(meta["y_min"], meta["y_max"], ny),
+    )
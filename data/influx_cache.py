@@ -0,0 +1,128 @@
+import os
+import logging
+import datetime
+import pandas as pd
+from collections import OrderedDict
+from data.influx_manager import empty_frame, query_fingerprint
+
+backend_logger = logging.getLogger("backend_logger")
+
+
+class CachedInfluxSource:
+    """
+    Wraps InfluxSource with a persistent cache of fetched observations,
+    one Parquet file per UTC day D holding rows with Time in (D, D+1],
+    under a subdirectory named by query_key (see query_fingerprint), so
+    results of a differently configured query are never served.
+    - Closed days (ended at least settle_hours ago) are read from disk and
+      downloaded from Influx only once.
+    - The still-open recent window is always queried from Influx.
+    - Empty answers are not cached, so a day is retried until data appears.
+    Has the same get_data/close interface as InfluxSource.
+    """
+
+    def __init__(self, source, cache_dir, settle_hours=2, memory_days=3, query_key=None):
+        """
+        Initializes the cache in cache_dir/query_key over the given InfluxSource.
+        Without query_key it is derived from the source's influx_config.
+        The last memory_days partitions are also kept in memory.
+        """
+        self.source = source
+        if query_key is None:
+            query_key = query_fingerprint(source.influx_config)
+        self.cache_dir = os.path.join(cache_dir, query_key)
+        self.settle = pd.Timedelta(hours=settle_hours)
+        self.memory_days = memory_days
+        self._days = OrderedDict()
+        self.stats = {"disk_days": 0, "fetched_days": 0, "open_queries": 0}
+
+    def close(self):
+        """
+        Closes the wrapped source.
+        """
+        self.source.close()
+
+    def get_data(self, start_time, end_time):
+        """
+        Returns rows with Time in (start_time, end_time] like InfluxSource.get_data.
+        Raises InfluxUnavailableError when a missing part cannot be fetched.
+        """
+        start = self._to_utc(start_time)
+        end = self._to_utc(end_time)
+        if end <= start:
+            return empty_frame()
+        closed_until = (pd.Timestamp.now(tz="UTC") - self.settle).floor("D")
+
+        frames = []
+        day = start.floor("D")
+        while day < end and day + pd.Timedelta(days=1) <= closed_until:
+            frames.append(self._day(day))
+            day += pd.Timedelta(days=1)
+        if day < end:
+            # Open window: whatever is not covered by closed days
+            self.stats["open_queries"] += 1
+            frames.append(self.source.get_data(max(start, day).to_pydatetime(), end.to_pydatetime()))
+
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return empty_frame()
+        df = pd.concat(frames, ignore_index=True)
+        df = df[(df["Time"] > start) & (df["Time"] <= end)].reset_index(drop=True)
+        df["ID"] = df["ID"].astype(str).astype("category")
+        return df
+
+    def _day(self, day):
+        """
+        Returns the partition of UTC day `day` from memory, disk or Influx.
+        """
+        cached = self._days.get(day)
+        if cached is not None:
+            self._days.move_to_end(day)
+            return cached
+
+        path = os.path.join(self.cache_dir, f"{day:%Y-%m-%d}.parquet")
+        df = None
+        if os.path.exists(path):
+            try:
+                df = pd.read_parquet(path)
+                df["Time"] = pd.to_datetime(df["Time"], utc=True)
+                self.stats["disk_days"] += 1
+            except Exception as e:
+                backend_logger.warning(f"Failed to read Influx cache {path}: {e}")
+                df = None
+
+        if df is None:
+            df = self.source.get_data(
+                day.to_pydatetime(), (day + pd.Timedelta(days=1)).to_pydatetime()
+            )
+            self.stats["fetched_days"] += 1
+            if df.empty:
+                return df
+            self._save(path, df)
+
+        self._days[day] = df
+        while len(self._days) > self.memory_days:
+            self._days.popitem(last=False)
+        return df
+
+    def _save(self, path, df):
+        """
+        Atomically writes a day partition; failures are only logged.
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+            backend_logger.info(f"Influx cache saved: {path} ({len(df)} rows)")
+        except Exception as e:
+            backend_logger.warning(f"Failed to write Influx cache {path}: {e}")
+
+    @staticmethod
+    def _to_utc(value):
+        """
+        Converts a (naive local or aware) datetime to a UTC pandas Timestamp.
+        """
+        if isinstance(value, pd.Timestamp) and value.tzinfo is not None:
+            return value.tz_convert("UTC")
+        return pd.Timestamp(value.astimezone(datetime.timezone.utc))
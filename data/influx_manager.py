@@ -1,19 +1,152 @@
 from influxdb_client import InfluxDBClient
+from influxdb_client.client.warnings import MissingPivotFunction
+from influxdb_client.rest import ApiException
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
 import pandas as pd
+import hashlib
+import json
 import logging
+import time
+import warnings
 from datetime import timezone
 
 backend_logger = logging.getLogger("backend_logger")
 
+# [influx] options that change what a query returns
+QUERY_KEYS = ("org", "bucket", "measurements", "fields", "window")
 
-def get_data(config, start_time, end_time):
+
+class InfluxUnavailableError(Exception):
+    """
+    Raised when InfluxDB could not be queried after all retries.
+    Marks a transient failure: the hour should be retried later, not skipped.
+    """
+
+
+class InfluxQueryError(Exception):
+    """
+    Raised when InfluxDB rejects the query with an HTTP 4xx (authentication,
+    Flux syntax, missing bucket). Retrying does not help, the configuration
+    must be fixed.
+    """
+
+
+class InfluxSource:
+    """
+    Reads weather station data from InfluxDB through one persistent, pooled client.
+    - Applies configured request timeout and connection pool size.
+    - Retries transient failures (network errors, HTTP 429/5xx) with exponential backoff.
+    - Raises InfluxUnavailableError once retries are exhausted and then fails fast
+      for [influx] circuit_open_seconds, so an outage costs one backoff sequence
+      per run instead of one per hour.
+    - Raises InfluxQueryError when the query is rejected (HTTP 4xx); other
+      errors propagate unchanged. An empty DataFrame always means Influx
+      answered with no data.
+    """
+
+    def __init__(self, config):
+        """
+        Initializes InfluxSource with configuration. The client is created lazily.
+        """
+        self.influx_config = config.get_influx_config()
+        self._client = None
+        self._unavailable_until = 0.0
+
+    def _get_client(self):
+        """
+        Returns the shared InfluxDBClient, creating it on first use.
+        """
+        if self._client is None:
+            self._client = InfluxDBClient(
+                url=self.influx_config["url"],
+                token=self.influx_config["token"],
+                org=self.influx_config["org"],
+                timeout=self.influx_config["timeout_ms"],
+                connection_pool_maxsize=self.influx_config["pool_size"],
+            )
+        return self._client
+
+    def close(self):
+        """
+        Closes the underlying client and its connection pool.
+        """
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def get_data(self, start_time, end_time):
+        """
+        Reads data from InfluxDB within the given UTC time range.
+        Returns DataFrame with columns: ['Time', 'Temperature', 'ID']
+        Raises InfluxUnavailableError when all retries of a transient failure fail
+        (or did so less than circuit_open_seconds ago), InfluxQueryError when
+        the query is rejected.
+        """
+        if time.monotonic() < self._unavailable_until:
+            raise InfluxUnavailableError(
+                "InfluxDB unavailable, query skipped until the next retry round."
+            )
+        query = build_query(self.influx_config, start_time, end_time)
+        retries = max(0, self.influx_config["retries"])
+
+        for attempt in range(retries + 1):
+            try:
+                with warnings.catch_warnings():
+                    # Results are read in long format (one row per station and window)
+                    warnings.simplefilter("ignore", MissingPivotFunction)
+                    result = self._get_client().query_api().query_data_frame(query=query)
+                df = frame_from_query_result(result)
+                if df.empty:
+                    backend_logger.info("Influx returned empty data from weather stations.")
+                return df
+
+            except Exception as e:
+                if is_rejected_query(e):
+                    raise InfluxQueryError(f"InfluxDB rejected the query: {e}") from e
+                if not is_transient_error(e):
+                    raise
+                if attempt >= retries:
+                    self._unavailable_until = (
+                        time.monotonic() + self.influx_config["circuit_open_seconds"]
+                    )
+                    raise InfluxUnavailableError(
+                        f"InfluxDB unavailable after {retries + 1} attempts: {e}"
+                    ) from e
+                delay = min(
+                    self.influx_config["backoff_seconds"] * 2 ** attempt,
+                    self.influx_config["backoff_max_seconds"],
+                )
+                backend_logger.warning(
+                    f"Transient InfluxDB error (attempt {attempt + 1}/{retries + 1}): {e}. "
+                    f"Retrying in {delay:.1f}s."
+                )
+                time.sleep(delay)
+
+
+def is_transient_error(exc):
     """
-    Reads data from InfluxDB within the given UTC time range.
-    Returns DataFrame with columns: ['Time', 'Temperature', 'ID']
+    Returns True for errors worth retrying: connection problems, timeouts,
+    HTTP 429 and 5xx responses.
     """
+    if isinstance(exc, ApiException):
+        return exc.status is None or exc.status == 429 or exc.status >= 500
+    return isinstance(exc, (Urllib3HTTPError, ConnectionError, TimeoutError, OSError))
 
-    influx_config = config.get_influx_config()
 
+def is_rejected_query(exc):
+    """
+    Returns True when InfluxDB rejected the query itself (HTTP 4xx other than 429).
+    """
+    return (
+        isinstance(exc, ApiException) and exc.status is not None
+        and 400 <= exc.status < 500 and exc.status != 429
+    )
+
+
+def build_query(influx_config, start_time, end_time):
+    """
+    Builds the Flux query for aggregated station temperatures in [start_time, end_time).
+    """
     start_time_iso = start_time.astimezone(timezone.utc).isoformat()
     end_time_iso = end_time.astimezone(timezone.utc).isoformat()
 
@@ -21,7 +154,7 @@ def get_data(config, start_time, end_time):
         [f'r["_measurement"] == "{m}"' for m in influx_config["measurements"]]
     )
 
-    query = f"""
+    return f"""
 from(bucket: "{influx_config['bucket']}")
   |> range(start: {start_time_iso}, stop: {end_time_iso})
   |> filter(fn: (r) => {meas_filter})
@@ -29,31 +162,68 @@ from(bucket: "{influx_config['bucket']}")
   |> keep(columns: ["_time","_value","_field"])
 """
 
+
+def query_config(influx_config):
+    """
+    Returns the [influx] options that shape query results (QUERY_KEYS) as a dict.
+    """
+    return {k: influx_config[k] for k in QUERY_KEYS}
+
+
+def query_fingerprint(influx_config):
+    """
+    Returns a short hash of query_config, e.g. to key cached query results.
+    """
+    payload = json.dumps(query_config(influx_config), sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def get_data(config, start_time, end_time):
+    """
+    Reads data from InfluxDB within the given UTC time range using a one-off client.
+    Returns DataFrame with columns: ['Time', 'Temperature', 'ID'],
+    or an empty DataFrame when Influx is unavailable.
+    """
+    source = InfluxSource(config)
     try:
-        with InfluxDBClient(
-                url=influx_config["url"],
-                token=influx_config["token"],
-                org=influx_config["org"],
-        ) as client:
-            result = client.query_api().query(query=query)
-
-        rows = [
-            {
-                "Time": rec.get_time(),
-                "Temperature": rec.get_value(),
-                "ID": rec.values["_field"],
-            }
-            for table in result
-            for rec in table.records
-        ]
-
-        df = pd.DataFrame(rows, columns=["Time", "Temperature", "ID"])
-
-        if df.empty:
-            backend_logger.info("Influx returned empty data from weather stations.")
-
-        return df
-
-    except Exception as e:
+        return source.get_data(start_time, end_time)
+    except InfluxUnavailableError as e:
         backend_logger.error(f"Error reading from InfluxDB: {e}")
         return pd.DataFrame()
+    finally:
+        source.close()
+
+
+def empty_frame():
+    """
+    Returns an empty DataFrame with the ['Time', 'Temperature', 'ID'] schema.
+    """
+    return pd.DataFrame(
+        {
+            "Time": pd.Series(dtype="datetime64[ns, UTC]"),
+            "Temperature": pd.Series(dtype="float64"),
+            "ID": pd.Series(dtype="category"),
+        }
+    )
+
+
+def frame_from_query_result(result):
+    """
+    Converts the columnar result of query_data_frame (one DataFrame or a list
+    of them) to columns ['Time', 'Temperature', 'ID'] with dtypes
+    datetime64[ns, UTC], float64 and category.
+    """
+    if isinstance(result, list):
+        result = [r for r in result if not r.empty]
+        result = pd.concat(result, ignore_index=True) if result else pd.DataFrame()
+
+    if result.empty or "_time" not in result.columns:
+        return empty_frame()
+
+    return pd.DataFrame(
+        {
+            "Time": pd.to_datetime(result["_time"], utc=True).astype("datetime64[ns, UTC]"),
+            "Temperature": pd.to_numeric(result["_value"], errors="coerce").astype("float64"),
+            "ID": result["_field"].astype(str).astype("category"),
+        }
+    )
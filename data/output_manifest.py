@@ -0,0 +1,126 @@
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+import datetime
+import pandas as pd
+from data.influx_manager import query_config
+
+backend_logger = logging.getLogger("backend_logger")
+
+
+def input_fingerprint(df):
+    """
+    Returns a fingerprint of the prepared station data of one hour
+    (station IDs, coordinates and temperatures, independent of row order).
+    """
+    cols = ["ID", "Latitude", "Longitude", "Temperature"]
+    frame = df[cols].astype({"ID": str}).sort_values("ID").reset_index(drop=True)
+    hashed = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    return hashlib.sha1(hashed.tobytes()).hexdigest()[:16]
+
+
+def config_fingerprint(config):
+    """
+    Returns a fingerprint of the configuration that affects the outputs
+    (grid, interpolation, visualization, output settings, Influx query and
+    input files).
+    """
+    paths = config.get_paths()
+    # predict_chunk_size and n_jobs do not change results
+    grid = {k: v for k, v in config.get_grid_config().items() if k != "predict_chunk_size"}
+    interpolation = {k: v for k, v in config.get_interpolation_config().items() if k != "n_jobs"}
+    relevant = {
+        "grid": grid,
+        "interpolation": interpolation,
+        "visualization": dict(config.get_visualization()),
+        "output": dict(config.get_output_config()),
+        "influx": query_config(config.get_influx_config()),
+        "inputs": {k: paths[k] for k in ("country_file", "dem_tif", "images_dir", "saved_grids_dir")},
+    }
+    payload = json.dumps(relevant, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class OutputManifest:
+    """
+    SQLite table of computed hours: input and config fingerprints and output paths.
+    An hour whose fingerprints match and whose outputs still exist does not
+    need to be recomputed. Safe to share between backfill worker processes
+    and between the threads of pipelined processing.
+    """
+
+    def __init__(self, path):
+        """
+        Opens (and creates if needed) the manifest database at path.
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS hours (
+                    hour      TEXT PRIMARY KEY,
+                    input_fp  TEXT NOT NULL,
+                    config_fp TEXT NOT NULL,
+                    outputs   TEXT NOT NULL,
+                    updated   TEXT NOT NULL
+                )
+            """)
+
+    @staticmethod
+    def _key(hour):
+        """
+        Normalizes hour to the manifest key (ISO timestamp).
+        """
+        return pd.Timestamp(hour).isoformat()
+
+    def get(self, hour):
+        """
+        Returns the manifest record of hour as a dict, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT input_fp, config_fp, outputs, updated FROM hours WHERE hour = ?",
+                (self._key(hour),),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "input_fp": row[0],
+            "config_fp": row[1],
+            "outputs": json.loads(row[2]),
+            "updated": row[3],
+        }
+
+    def is_current(self, hour, input_fp, config_fp):
+        """
+        Checks whether hour was computed from the same inputs and config
+        and all its recorded outputs still exist.
+        """
+        record = self.get(hour)
+        if record is None:
+            return False
+        if record["input_fp"] != input_fp or record["config_fp"] != config_fp:
+            return False
+        return bool(record["outputs"]) and all(os.path.exists(p) for p in record["outputs"])
+
+    def record(self, hour, input_fp, config_fp, outputs):
+        """
+        Stores (or replaces) the record of a computed hour.
+        """
+        updated = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO hours VALUES (?, ?, ?, ?, ?)",
+                (self._key(hour), input_fp, config_fp, json.dumps(list(outputs)), updated),
+            )
+
+    def close(self):
+        """
+        Closes the database connection.
+        """
+        self._conn.close()
@@ -0,0 +1,171 @@
+import os
+import time
+import logging
+import pandas as pd
+from sqlalchemy import text
+
+backend_logger = logging.getLogger("backend_logger")
+
+
+def _to_float(values):
+    """
+    Converts DB values (numbers or strings with decimal comma) to float, invalid -> NaN.
+    """
+    s = pd.Series(values, dtype=object).astype(str).str.strip().str.replace(",", ".", regex=False)
+    return pd.to_numeric(s, errors="coerce").astype("float64").to_numpy()
+
+
+def station_meta_frame(rows):
+    """
+    Builds the station metadata frame (index station_id; lon, lat, elev) from DB rows.
+    Keeps the first row for duplicated station ids.
+    """
+    records = [r._mapping for r in rows]
+    meta = pd.DataFrame(
+        {
+            "lon": _to_float([m["lon"] for m in records]),
+            "lat": _to_float([m["lat"] for m in records]),
+            "elev": _to_float([m["elev"] for m in records]),
+        },
+        index=pd.Index([str(m["station_id"]).strip() for m in records], dtype=object, name="station_id"),
+    )
+    return meta[~meta.index.duplicated(keep="first")]
+
+
+class StationRegistry:
+    """
+    In-memory table of weather station metadata from chmi_metadata.weather_stations.
+    - Loads all stations with one query and refreshes them after ttl_seconds.
+    - Refreshes early (at most every miss_refresh_seconds) when unknown stations appear.
+    - Persists a Parquet snapshot so workers and restarts can start without MySQL.
+    - Counts lookup hits, misses and refreshes in `stats`.
+    """
+
+    def __init__(self, engine, snapshot_path=None, ttl_seconds=3600, miss_refresh_seconds=300):
+        """
+        Initializes the registry. Call load() to fill it.
+        """
+        self.engine = engine
+        self.snapshot_path = snapshot_path
+        self.ttl_seconds = ttl_seconds
+        self.miss_refresh_seconds = miss_refresh_seconds
+        self.table = pd.DataFrame(
+            columns=["lon", "lat", "elev"], index=pd.Index([], dtype=object, name="station_id"),
+            dtype="float64",
+        )
+        self.loaded_at = None
+        self._last_attempt = None
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_failures": 0,
+            "snapshot_loads": 0,
+        }
+
+    def load(self):
+        """
+        Initial load: uses the snapshot if it is younger than the TTL,
+        otherwise queries MySQL and falls back to an older snapshot on failure.
+        """
+        if self._load_snapshot(max_age=self.ttl_seconds):
+            return
+        if self.refresh():
+            return
+        self._load_snapshot(max_age=None)
+
+    def refresh(self):
+        """
+        Reloads all stations from MySQL and writes the snapshot.
+        Returns True on success; on failure the current table is kept.
+        """
+        self._last_attempt = time.time()
+        try:
+            with self.engine.connect() as conn:
+                rows = conn.execute(text("""
+                    SELECT
+                        gh_id     AS station_id,
+                        X         AS lon,     -- Longitude
+                        Y         AS lat,     -- Latitude
+                        elevation AS elev
+                    FROM chmi_metadata.weather_stations
+                """)).all()
+        except Exception as e:
+            self.stats["refresh_failures"] += 1
+            backend_logger.error(f"Station registry refresh failed: {e}")
+            return False
+
+        self.table = station_meta_frame(rows)
+        self.loaded_at = self._last_attempt
+        self.stats["refreshes"] += 1
+        backend_logger.info(f"Station registry loaded {len(self.table)} stations from MySQL.")
+        self._save_snapshot()
+        return True
+
+    def lookup(self, station_ids):
+        """
+        Returns metadata for station_ids in the given order (one row per id,
+        NaN for unknown or empty ids). Refreshes the table when it is stale.
+        """
+        if self._refresh_due(self.ttl_seconds):
+            self.refresh()
+
+        unique_ids = pd.Series(station_ids, dtype=object).dropna().unique()
+        unique_ids = unique_ids[unique_ids != ""]
+        unknown = ~pd.Index(unique_ids).isin(self.table.index)
+        if unknown.any() and self._refresh_due(self.miss_refresh_seconds, force=True):
+            self.refresh()
+            unknown = ~pd.Index(unique_ids).isin(self.table.index)
+
+        n_unknown = int(unknown.sum())
+        self.stats["misses"] += n_unknown
+        self.stats["hits"] += len(unique_ids) - n_unknown
+        return self.table.reindex(station_ids)
+
+    def _refresh_due(self, max_age, force=False):
+        """
+        Checks whether the table is older than max_age (or force is set) and the
+        last refresh attempt is old enough to try MySQL again.
+        """
+        now = time.time()
+        if self._last_attempt is not None and now - self._last_attempt < self.miss_refresh_seconds:
+            return False
+        return force or self.loaded_at is None or now - self.loaded_at > max_age
+
+    def _load_snapshot(self, max_age=None):
+        """
+        Loads the Parquet snapshot if it exists and is not older than max_age seconds.
+        """
+        path = self.snapshot_path
+        if not path or not os.path.exists(path):
+            return False
+        mtime = os.path.getmtime(path)
+        if max_age is not None and time.time() - mtime > max_age:
+            return False
+        try:
+            table = pd.read_parquet(path)
+        except Exception as e:
+            backend_logger.warning(f"Failed to read station snapshot {path}: {e}")
+            return False
+
+        table.index = table.index.astype(object).rename("station_id")
+        self.table = table[["lon", "lat", "elev"]].astype("float64")
+        self.loaded_at = mtime
+        self.stats["snapshot_loads"] += 1
+        backend_logger.info(f"Station registry loaded {len(self.table)} stations from {path}.")
+        return True
+
+    def _save_snapshot(self):
+        """
+        Atomically writes the current table to the snapshot path; failures are only logged.
+        """
+        path = self.snapshot_path
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            self.table.to_parquet(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            backend_logger.warning(f"Failed to write station snapshot {path}: {e}")
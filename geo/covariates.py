@@ -0,0 +1,109 @@
+import warnings
+import numpy as np
+from pyproj import CRS
+from core.config import COVARIATES
+
+# Metres per degree of latitude (approximate, for slopes on geographic DEMs)
+METRES_PER_DEGREE = 111320.0
+
+
+class CovariateStack:
+    """
+    Samples regression covariates from the DEM at raster pixel indices:
+    - elevation: DEM value,
+    - lat, lon: WGS84 coordinates of the point,
+    - slope: terrain slope in degrees (central differences),
+    - northness, eastness: cos/sin of the aspect weighted by sin(slope),
+    - tpi: topographic position index, elevation minus the mean elevation
+      of the (2 * tpi_radius + 1) square window around the pixel.
+    Values are computed only at the requested points, so no full-size
+    derived rasters are kept. Terrain features depend only on the pixel (on
+    geographic DEMs the pixel size in metres comes from the latitude of its
+    row). Missing values are filled from the DEM, not from the sampled points:
+    elevation with the mean of the read DEM window, terrain features with 0
+    (flat). So grid cells and stations on the same pixel get the same values.
+    Returns float32 feature matrices.
+    """
+
+    def __init__(self, elevation_data, transform_matrix, crs, names=("elevation",),
+                 tpi_radius=5, chunk_size=20000):
+        """
+        Initializes the stack for DEM elevation_data with transform_matrix in crs.
+        """
+        unknown = [n for n in names if n not in COVARIATES]
+        if not names or unknown:
+            raise ValueError(f"Unknown covariates: {unknown or names}")
+        self.elevation_data = elevation_data
+        self.names = tuple(names)
+        self.tpi_radius = tpi_radius
+        self.chunk_size = chunk_size
+        self.transform_matrix = transform_matrix
+        self.pixel_x = abs(transform_matrix.a)
+        self.pixel_y = abs(transform_matrix.e)
+        self.geographic = crs is not None and CRS.from_user_input(crs).is_geographic
+
+        # Fill values of missing features, shared by all sampled points
+        self.fill_values = {name: 0.0 for name in COVARIATES}
+        if np.isfinite(elevation_data).any():
+            self.fill_values["elevation"] = float(np.nanmean(elevation_data, dtype=np.float64))
+
+    def sample(self, rows, cols, lon, lat):
+        """
+        Returns the feature matrix (points, len(names)) float32 for raster
+        pixels rows, cols of points with WGS84 coordinates lon, lat.
+        """
+        rows = np.asarray(rows)
+        cols = np.asarray(cols)
+        features = np.empty((len(rows), len(self.names)), dtype=np.float32)
+        for start in range(0, len(rows), self.chunk_size):
+            sl = slice(start, start + self.chunk_size)
+            features[sl] = self._sample_chunk(
+                rows[sl], cols[sl], np.asarray(lon)[sl], np.asarray(lat)[sl]
+            )
+
+        for j, name in enumerate(self.names):
+            column = features[:, j]
+            column[np.isnan(column)] = self.fill_values[name]
+        return features
+
+    def _sample_chunk(self, rows, cols, lon, lat):
+        """
+        Computes the features of one chunk of points.
+        """
+        dem = self.elevation_data
+        n_rows, n_cols = dem.shape
+        elevation = np.asarray(dem[rows, cols], dtype=np.float64)
+        columns = {"elevation": elevation, "lat": lat, "lon": lon}
+
+        if {"slope", "northness", "eastness"} & set(self.names):
+            r_lo, r_hi = np.maximum(rows - 1, 0), np.minimum(rows + 1, n_rows - 1)
+            c_lo, c_hi = np.maximum(cols - 1, 0), np.minimum(cols + 1, n_cols - 1)
+            dx, dy = self.pixel_x, self.pixel_y
+            if self.geographic:
+                # Latitude of the pixel row centre (north-up raster)
+                row_lat = self.transform_matrix.f + (rows + 0.5) * self.transform_matrix.e
+                dx = dx * METRES_PER_DEGREE * np.cos(np.radians(row_lat))
+                dy = dy * METRES_PER_DEGREE
+            with np.errstate(invalid="ignore", divide="ignore"):
+                dz_east = (dem[rows, c_hi] - dem[rows, c_lo]) / (np.maximum(c_hi - c_lo, 1) * dx)
+                dz_north = (dem[r_lo, cols] - dem[r_hi, cols]) / (np.maximum(r_hi - r_lo, 1) * dy)
+            slope = np.arctan(np.hypot(dz_east, dz_north))
+            # Azimuth of the downslope direction, clockwise from north
+            azimuth = np.arctan2(-dz_east, -dz_north)
+            columns["slope"] = np.degrees(slope)
+            columns["northness"] = np.cos(azimuth) * np.sin(slope)
+            columns["eastness"] = np.sin(azimuth) * np.sin(slope)
+
+        if "tpi" in self.names:
+            offsets = np.arange(-self.tpi_radius, self.tpi_radius + 1)
+            win_rows = np.clip(rows[:, None] + offsets[None, :], 0, n_rows - 1)
+            win_cols = np.clip(cols[:, None] + offsets[None, :], 0, n_cols - 1)
+            window = np.asarray(
+                dem[win_rows[:, :, None], win_cols[:, None, :]], dtype=np.float64
+            ).reshape(len(rows), -1)
+            with warnings.catch_warnings():
+                # All-NaN windows give NaN, filled in sample()
+                warnings.simplefilter("ignore", RuntimeWarning)
+                columns["tpi"] = elevation - np.nanmean(window, axis=1)
+
+        return np.column_stack([columns[name] for name in self.names])
@@ -1,15 +1,35 @@
 import geopandas as gpd
-from shapely.geometry import Polygon, Point
+import shapely
+from shapely.geometry import Polygon
 import numpy as np
+import hashlib
 import json
+import logging
+import os
 import rasterio
+from affine import Affine
+from rasterio.enums import Resampling
+from rasterio.transform import rowcol
+from rasterio.warp import transform_bounds
+from rasterio.windows import Window, from_bounds
 from pyproj import Transformer
 
+backend_logger = logging.getLogger("backend_logger")
+
+
 class GeographicalProcessing:
     """
     Provides geographical utilities for country shape, mask creation, and elevation data.
     """
 
+    def __init__(self, cache_dir=None):
+        """
+        Initializes GeographicalProcessing.
+        cache_dir: optional directory for on-disk caches (country masks, DEM).
+        """
+        self.cache_dir = cache_dir
+        self._mask_cache = {}
+
     def json_to_geodataframe(self, json_data):
         """
         Converts GeoJSON data to a GeoDataFrame.
@@ -24,14 +44,70 @@ class GeographicalProcessing:
     def create_mask(self, czech_rep, grid_x, grid_y):
         """
         Creates a boolean mask for grid points inside the country polygon.
+        - Evaluates all grid points at once with shapely bulk predicates.
+        - Caches the mask in memory and in cache_dir, keyed by geometry and grid.
+        Returned mask is read-only and shared between calls.
         """
-        mask = np.zeros_like(grid_x, dtype=bool)
-        for i in range(grid_x.shape[0]):
-            for j in range(grid_x.shape[1]):
-                point = Point(grid_x[i, j], grid_y[i, j])
-                mask[i, j] = czech_rep.contains(point).any()
+        key = self._mask_key(czech_rep, grid_x, grid_y)
+        mask = self._mask_cache.get(key)
+        if mask is not None:
+            return mask
+
+        cache_path = (
+            os.path.join(self.cache_dir, f"mask_{key}.npy") if self.cache_dir else None
+        )
+        if cache_path and os.path.exists(cache_path):
+            try:
+                mask = np.load(cache_path)
+                if mask.shape != grid_x.shape or mask.dtype != bool:
+                    mask = None
+            except Exception as e:
+                backend_logger.warning(f"Failed to read cached mask {cache_path}: {e}")
+                mask = None
+
+        if mask is None:
+            mask = np.zeros(grid_x.shape, dtype=bool)
+            for geom in czech_rep.geometry:
+                if geom is None or geom.is_empty:
+                    continue
+                shapely.prepare(geom)
+                mask |= shapely.contains_xy(geom, grid_x, grid_y)
+            if cache_path:
+                self._save_mask(cache_path, mask)
+            backend_logger.info(
+                "create_mask: computed %s mask (%d cells inside).", mask.shape, mask.sum()
+            )
+
+        mask.flags.writeable = False
+        self._mask_cache[key] = mask
         return mask
 
+    def _mask_key(self, czech_rep, grid_x, grid_y):
+        """
+        Returns a fingerprint of the country geometry, its CRS and the grid layout.
+        """
+        h = hashlib.sha1()
+        h.update(str(czech_rep.crs).encode("utf-8"))
+        for wkb in shapely.to_wkb(np.asarray(czech_rep.geometry)):
+            h.update(wkb or b"")
+        h.update(np.asarray(grid_x.shape, dtype=np.int64).tobytes())
+        for arr in (grid_x, grid_y):
+            h.update(np.asarray([arr.min(), arr.max()], dtype=np.float64).tobytes())
+        return h.hexdigest()[:16]
+
+    def _save_mask(self, cache_path, mask):
+        """
+        Atomically writes the mask to cache_path; failures are only logged.
+        """
+        try:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as fh:
+                np.save(fh, mask)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            backend_logger.warning(f"Failed to write mask cache {cache_path}: {e}")
+
     def load_country_data(self, country_file_path):
         """
         Loads country shape data from a GeoJSON file.
@@ -39,16 +115,122 @@ class GeographicalProcessing:
         with open(country_file_path, "r", encoding="utf-8") as file:
             return json.load(file)
 
-    def load_elevation_data(self, tif_path):
+    def load_elevation_data(
+        self,
+        tif_path,
+        bounds=None,
+        bounds_crs=None,
+        margin=0.05,
+        downscale=1,
+        dtype="float64",
+        mmap_cache=False,
+    ):
         """
         Loads elevation data from a GeoTIFF file.
+        - bounds (min_x, min_y, max_x, max_y in bounds_crs, e.g. czech_rep.total_bounds):
+          reads only the window covering them, enlarged by margin (fraction of
+          the extent) so stations near the border keep their elevation.
+        - downscale > 1: reads at 1/downscale resolution (averaged, GDAL uses
+          overviews when present).
+        - dtype: float64 or float32; nodata becomes NaN without an extra full copy.
+        - mmap_cache: stores the result as .npy in cache_dir and memory-maps it
+          read-only on later loads, so worker processes share its pages.
         Returns: elevation_data (2D np.ndarray), transform (Affine), crs (CRS)
         """
         with rasterio.open(tif_path) as src:
-            elevation_data = src.read(1)
-            nodata = src.nodata
-            if nodata is not None:
-                elevation_data = np.where(elevation_data == nodata, np.nan, elevation_data)
-            transform_matrix = src.transform  
+            window = Window(0, 0, src.width, src.height)
+            if bounds is not None:
+                window = self._dem_window(src, bounds, bounds_crs, margin)
+            out_shape = (
+                max(1, int(round(window.height / downscale))),
+                max(1, int(round(window.width / downscale))),
+            )
+            transform_matrix = src.window_transform(window) * Affine.scale(
+                window.width / out_shape[1], window.height / out_shape[0]
+            )
             crs = src.crs
-        return elevation_data, transform_matrix, crs
\ No newline at end of file
+
+            cache_path = None
+            if mmap_cache and self.cache_dir:
+                stat = os.stat(tif_path)
+                key = hashlib.sha1(repr((
+                    os.path.abspath(tif_path), stat.st_size, stat.st_mtime_ns,
+                    tuple(window.flatten()), out_shape, dtype,
+                )).encode("utf-8")).hexdigest()[:16]
+                cache_path = os.path.join(self.cache_dir, f"dem_{key}.npy")
+                if os.path.exists(cache_path):
+                    try:
+                        elevation_data = np.load(cache_path, mmap_mode="r")
+                        if elevation_data.shape == out_shape:
+                            backend_logger.info(
+                                f"DEM memory-mapped from {cache_path} {out_shape}."
+                            )
+                            return elevation_data, transform_matrix, crs
+                    except Exception as e:
+                        backend_logger.warning(f"Failed to read cached DEM {cache_path}: {e}")
+
+            resampling = Resampling.average if downscale > 1 else Resampling.nearest
+            raw = src.read(1, window=window, out_shape=out_shape, resampling=resampling)
+            nodata = src.nodata
+
+        # Mask is taken from the raw values, the cast may reuse the same buffer
+        nodata_mask = raw == nodata if nodata is not None else None
+        elevation_data = raw.astype(dtype, copy=False)
+        if nodata_mask is not None:
+            elevation_data[nodata_mask] = np.nan
+        backend_logger.info(
+            f"DEM loaded: window {window.height}x{window.width} -> {out_shape} {dtype}."
+        )
+
+        if cache_path:
+            self._save_dem(cache_path, elevation_data)
+            try:
+                elevation_data = np.load(cache_path, mmap_mode="r")
+            except Exception as e:
+                backend_logger.warning(f"Failed to map cached DEM {cache_path}: {e}")
+        return elevation_data, transform_matrix, crs
+
+    @staticmethod
+    def _dem_window(src, bounds, bounds_crs, margin):
+        """
+        Returns the raster window covering bounds (in bounds_crs) plus margin,
+        clipped to the raster. Raises ValueError if bounds do not overlap the DEM.
+        """
+        if bounds_crs is not None and src.crs is not None:
+            bounds = transform_bounds(bounds_crs, src.crs, *bounds, densify_pts=21)
+        min_x, min_y, max_x, max_y = bounds
+        pad_x = (max_x - min_x) * margin
+        pad_y = (max_y - min_y) * margin
+        window = from_bounds(
+            min_x - pad_x, min_y - pad_y, max_x + pad_x, max_y + pad_y, src.transform
+        ).round_offsets(op="floor").round_lengths(op="ceil")
+        if (window.col_off >= src.width or window.row_off >= src.height
+                or window.col_off + window.width <= 0 or window.row_off + window.height <= 0):
+            raise ValueError(
+                f"DEM {src.name} (bounds {tuple(src.bounds)}) does not overlap "
+                f"the country bounds {tuple(bounds)} in {src.crs}."
+            )
+        return window.intersection(Window(0, 0, src.width, src.height))
+
+    def _save_dem(self, cache_path, elevation_data):
+        """
+        Atomically writes the DEM to cache_path; failures are only logged.
+        """
+        try:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as fh:
+                np.save(fh, elevation_data)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            backend_logger.warning(f"Failed to write DEM cache {cache_path}: {e}")
+
+    def raster_indices(self, transform_matrix, raster_shape, xs, ys):
+        """
+        Converts coordinates in raster CRS to row/col indices clipped to raster_shape.
+        Returns: rows, cols (1D int arrays)
+        """
+        rows, cols = rowcol(transform_matrix, xs, ys)
+        rows = np.clip(np.floor(rows).astype(int), 0, raster_shape[0] - 1)
+        cols = np.clip(np.floor(cols).astype(int), 0, raster_shape[1] - 1)
+        return rows, cols
@@ -1,14 +1,211 @@
+import hashlib
 import numpy as np
-from rasterio.transform import rowcol
-from pyproj import Transformer
-from pykrige.rk import RegressionKriging
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.svm import SVR
+from collections import OrderedDict
+from scipy.sparse import csr_matrix
+from scipy.spatial import cKDTree
+from pykrige.ok import OrdinaryKriging
 import logging
+from geo.prediction_grid import PredictionGrid
+from core.metrics import timed
+from geo.variogram_cache import VARIOGRAM_PARAMETER_NAMES, variogram_parameters_dict
 
 backend_logger = logging.getLogger('backend_logger')
 
+
+class NeighbourCacheKriging:
+    """
+    Kriging backend for regression residuals with a moving neighbourhood.
+    Solves the same ordinary kriging system as pykrige's OrdinaryKriging with
+    n_closest_points, but caches the neighbour indices of every grid cell per
+    station-set fingerprint and grid, so the KD-tree search is repeated only
+    when the set of active stations changes. Systems are solved in batches
+    of chunk_size cells; the resulting weights are kept for the last
+    variogram of each station set and reused while it does not change.
+    """
+
+    def __init__(self, n_closest_points=20, chunk_size=10000, max_entries=4):
+        """
+        Initializes the backend with an LRU cache of max_entries neighbour sets.
+        """
+        self.n_closest_points = n_closest_points
+        self.chunk_size = chunk_size
+        self.max_entries = max_entries
+        self._neighbours = OrderedDict()
+        self._weight_cache = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def fingerprint(station_coords):
+        """
+        Returns a fingerprint of station coordinates (set and order of stations).
+        """
+        coords = np.ascontiguousarray(station_coords, dtype=np.float64)
+        return hashlib.sha1(coords.tobytes()).hexdigest()[:16]
+
+    def neighbours(self, station_coords, grid_coords, grid_key):
+        """
+        Returns (indices, distances) of the closest stations for each grid cell,
+        both of shape (cells, k), from cache when the station set is unchanged.
+        """
+        key = (self.fingerprint(station_coords), grid_key)
+        cached = self._neighbours.get(key)
+        if cached is not None:
+            self._neighbours.move_to_end(key)
+            self.stats["hits"] += 1
+            return cached
+
+        self.stats["misses"] += 1
+        k = min(self.n_closest_points, len(station_coords))
+        dist, idx = cKDTree(station_coords).query(grid_coords, k=k)
+        idx = np.asarray(idx, dtype=np.int32).reshape(len(grid_coords), k)
+        dist = np.asarray(dist, dtype=np.float64).reshape(len(grid_coords), k)
+        self._neighbours[key] = (idx, dist)
+        while len(self._neighbours) > self.max_entries:
+            self._neighbours.popitem(last=False)
+        backend_logger.info("Kriging neighbours computed for station set %s (%d stations).",
+                            key[0], len(station_coords))
+        return idx, dist
+
+    def weights(self, station_coords, grid_coords, grid_key, variogram_model,
+                variogram_function, params, eps=1e-10):
+        """
+        Returns (indices, weights) of shape (cells, k): kriging weights of the
+        closest stations for each grid cell. Weights are cached together with
+        the neighbours for the same variogram model and parameters.
+        """
+        idx, dist = self.neighbours(station_coords, grid_coords, grid_key)
+        fp = (self.fingerprint(station_coords), grid_key)
+        vkey = (variogram_model, tuple(np.round(np.asarray(params, dtype=np.float64), 12)))
+        cached = self._weight_cache.get(fp)
+        if cached is not None and cached[0] == vkey:
+            return idx, cached[1]
+
+        w = np.empty(idx.shape)
+        for start in range(0, len(grid_coords), self.chunk_size):
+            sl = slice(start, start + self.chunk_size)
+            w[sl] = self._weights(
+                station_coords, idx[sl], dist[sl], variogram_function, params, eps
+            )
+        self._weight_cache[fp] = (vkey, w)
+        while len(self._weight_cache) > self.max_entries:
+            self._weight_cache.pop(next(iter(self._weight_cache)))
+        return idx, w
+
+    def weight_matrix(self, station_coords, grid_coords, grid_key, variogram_model,
+                      variogram_function, params, eps=1e-10):
+        """
+        Returns kriging weights as a sparse (cells, stations) CSR matrix, so
+        residuals of many hours can be kriged with one matrix product.
+        """
+        idx, w = self.weights(station_coords, grid_coords, grid_key, variogram_model,
+                              variogram_function, params, eps)
+        m, k = idx.shape
+        indptr = np.arange(0, m * k + 1, k)
+        return csr_matrix((w.ravel(), idx.ravel(), indptr), shape=(m, len(station_coords)))
+
+    def krige(self, krige_model, station_coords, residuals, grid_coords, grid_key=None):
+        """
+        Kriges residuals at grid_coords using the variogram of a fitted
+        pykrige OrdinaryKriging model. grid_key identifies the grid for caching
+        (defaults to a fingerprint of grid_coords).
+        """
+        if grid_key is None:
+            grid_key = self.fingerprint(grid_coords)
+        idx, w = self.weights(
+            station_coords, grid_coords, grid_key, krige_model.variogram_model,
+            krige_model.variogram_function, krige_model.variogram_model_parameters,
+            krige_model.eps,
+        )
+        return np.einsum("ij,ij->i", w, residuals[idx])
+
+    @staticmethod
+    def _weights(station_coords, idx, dist, variogram_function, params, eps):
+        """
+        Solves the ordinary kriging systems of a batch of cells.
+        Returns kriging weights of shape (cells, k).
+        """
+        m, k = idx.shape
+        pts = station_coords[idx]
+        d = np.sqrt(((pts[:, :, None, :] - pts[:, None, :, :]) ** 2).sum(axis=-1))
+
+        a = np.ones((m, k + 1, k + 1))
+        a[:, :k, :k] = -variogram_function(params, d)
+        a[:, np.arange(k), np.arange(k)] = 0.0
+        a[:, k, k] = 0.0
+
+        b = np.ones((m, k + 1))
+        b[:, :k] = -variogram_function(params, dist)
+        b[:, :k][np.abs(dist) <= eps] = 0.0
+
+        return np.linalg.solve(a, b[:, :, None])[:, :k, 0]
+
+def make_regression_model(regression_model_type, n_jobs=None):
+    """
+    Creates the regression model used for the trend part of regression kriging.
+    Only the scikit-learn module of the selected model is imported.
+    n_jobs (-1 = all cores) parallelises the models that support it.
+    """
+    if regression_model_type == 'linear':
+        from sklearn.linear_model import LinearRegression
+        return LinearRegression(n_jobs=n_jobs)
+    elif regression_model_type == 'random_forest':
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=n_jobs)
+    elif regression_model_type == 'gradient_boosting':
+        from sklearn.ensemble import GradientBoostingRegressor
+        return GradientBoostingRegressor(n_estimators=100, learning_rate=0.1, random_state=42)
+    elif regression_model_type == 'svr':
+        from sklearn.svm import SVR
+        return SVR(kernel='rbf', C=1.0, epsilon=0.1)
+    raise ValueError(f"Unknown regression model type: {regression_model_type}")
+
+
+def predict_in_chunks(predict, values, chunk_size=0):
+    """
+    Calls predict on consecutive chunks of chunk_size rows (0 = all at once)
+    and concatenates the results, so peak memory does not grow with the grid.
+    """
+    if len(values) == 0:
+        return np.empty(0)
+    step = chunk_size if chunk_size and chunk_size > 0 else len(values)
+    return np.concatenate([predict(values[i:i + step]) for i in range(0, len(values), step)])
+
+
+def krige_residuals(krige_model, coords_train, prediction_grid, kriging_backend=None,
+                    chunk_size=0, coarse_factor=1, n_closest_points=20):
+    """
+    Kriges the residuals of a fitted OrdinaryKriging model at the in-country cells.
+    - With kriging_backend, uses its cached neighbourhoods, otherwise pykrige
+      (n_closest_points, loop backend) in chunks of chunk_size cells.
+    - With coarse_factor > 1, kriges on a grid coarse_factor-times coarser
+      and upsamples the residual field bilinearly; the elevation trend is
+      still evaluated at full resolution by the caller.
+    """
+    if coarse_factor > 1:
+        _, _, coords = prediction_grid.coarse(coarse_factor)
+        grid_key = f"{prediction_grid.key}-c{coarse_factor}"
+    else:
+        coords = prediction_grid.inside_coords
+        grid_key = prediction_grid.key
+
+    if kriging_backend is not None:
+        residuals = kriging_backend.krige(
+            krige_model, coords_train, krige_model.Z, coords, grid_key=grid_key
+        )
+    else:
+        def krige_points(points):
+            return krige_model.execute(
+                "points", points[:, 0], points[:, 1],
+                n_closest_points=n_closest_points, backend="loop",
+            )[0]
+
+        residuals = predict_in_chunks(krige_points, coords, chunk_size)
+
+    if coarse_factor > 1:
+        residuals = prediction_grid.upsample(coarse_factor, residuals)
+    return residuals
+
+
 def spatial_interpolation(
     df,
     rep,
@@ -20,26 +217,42 @@ def spatial_interpolation(
     nlags=40,
     regression_model_type='linear',
     grid_x_points=500,
-    grid_y_points=500
+    grid_y_points=500,
+    prediction_grid=None,
+    variogram_cache=None,
+    map_time=None,
+    kriging_backend=None,
+    chunk_size=0,
+    coarse_factor=1,
+    metrics=None,
+    n_jobs=None,
 ):
     """
     Performs spatial interpolation (regression kriging) of temperature data.
     - Generates grid over country bounds.
-    - Applies mask for valid country area.
-    - Uses elevation as covariate.
-    - Supports multiple regression models.
+    - Predicts only cells inside the country mask, others are NaN.
+    - Uses the grid's covariate stack (elevation by default) as regression features.
+    - Supports multiple regression models (n_jobs cores where supported).
+    A prebuilt PredictionGrid can be passed to skip grid projection and DEM sampling.
+    With a VariogramCache, variogram parameters cached for map_time and a stable
+    station set are reused instead of fitting the empirical variogram.
+    With a NeighbourCacheKriging backend, residuals are kriged with cached
+    neighbourhoods instead of pykrige's per-call KD-tree and loop.
+    Cells are predicted in chunks of chunk_size (0 = all at once); with
+    coarse_factor > 1 residuals are kriged on a coarser grid and upsampled.
+    Stage timings are added to metrics (HourMetrics) when given.
     Returns grid_x, grid_y, grid_predicted_temp.
     """
     backend_logger.info("spatial_interpolation start (model=%s, variogram=%s, nlags=%s)",
                         regression_model_type, variogram_model, nlags)
     try:
-        rep_crs = getattr(rep, "crs", None) or "EPSG:4326"
-        bounds = rep.total_bounds  # v CRS rep
-        grid_x, grid_y = np.mgrid[
-            bounds[0]:bounds[2]:complex(grid_x_points),
-            bounds[1]:bounds[3]:complex(grid_y_points)
-        ]
-        mask = geo_proc.create_mask(rep, grid_x, grid_y)
+        if prediction_grid is None:
+            with timed(metrics, "mask"):
+                prediction_grid = PredictionGrid(
+                    rep, geo_proc, elevation_data, transform_matrix, crs,
+                    x_points=grid_x_points, y_points=grid_y_points,
+                )
+        grid_x, grid_y = prediction_grid.grid_x, prediction_grid.grid_y
 
         valid_points = (~df['Longitude'].isna()) & (~df['Latitude'].isna()) & (~df['Temperature'].isna())
         if valid_points.sum() < 3:
@@ -49,64 +262,189 @@ def spatial_interpolation(
         lat = df.loc[valid_points, 'Latitude'].values
         temp = df.loc[valid_points, 'Temperature'].values
 
-        # Transform coordinates to raster CRS
-        to_raster_from_wgs = Transformer.from_crs("EPSG:4326", crs, always_xy=True)
-        x_pts_raster, y_pts_raster = to_raster_from_wgs.transform(lon, lat)
-
-        # Elevation for measured points
-        rows, cols = rowcol(transform_matrix, x_pts_raster, y_pts_raster)
-        rows = np.clip(np.floor(rows).astype(int), 0, elevation_data.shape[0] - 1)
-        cols = np.clip(np.floor(cols).astype(int), 0, elevation_data.shape[1] - 1)
-        valid_elev = elevation_data[rows, cols]
-        if np.isnan(valid_elev).any():
-            mean_elev = np.nanmean(valid_elev)
-            valid_elev = np.nan_to_num(valid_elev, nan=(0.0 if np.isnan(mean_elev) else mean_elev))
-
-        # Regression model selection
-        if regression_model_type == 'linear':
-            regression_model = LinearRegression()
-        elif regression_model_type == 'random_forest':
-            regression_model = RandomForestRegressor(n_estimators=100, random_state=42)
-        elif regression_model_type == 'gradient_boosting':
-            regression_model = GradientBoostingRegressor(n_estimators=100, learning_rate=0.1, random_state=42)
-        elif regression_model_type == 'svr':
-            regression_model = SVR(kernel='rbf', C=1.0, epsilon=0.1)
+        # Station coordinates in raster CRS and their covariates
+        with timed(metrics, "station_features"):
+            coords_train, X_train = prediction_grid.station_features(lon, lat)
+        regression_model = make_regression_model(regression_model_type, n_jobs=n_jobs)
+
+        # Reuse cached variogram parameters when possible
+        cache_entry = None
+        if variogram_cache is not None and variogram_cache.enabled:
+            if map_time is None:
+                map_time = df['Time'].max()
+            station_ids = df.loc[valid_points, 'ID'].astype(str).tolist()
+            cache_entry = variogram_cache.get(
+                regression_model_type, variogram_model, nlags, map_time, station_ids
+            )
+
+        # Regression kriging: trend from the covariates, ordinary kriging of residuals
+        with timed(metrics, "regression_fit"):
+            regression_model.fit(X_train, temp)
+            trend_train = regression_model.predict(X_train)
+        with timed(metrics, "variogram_fit"):
+            krige_model = OrdinaryKriging(
+                coords_train[:, 0], coords_train[:, 1], temp - trend_train,
+                variogram_model=variogram_model,
+                variogram_parameters=cache_entry["params"] if cache_entry else None,
+                nlags=nlags,
+            )
+
+        if cache_entry:
+            backend_logger.info("Variogram: cached %s (fitted for %s) %s",
+                                cache_entry["id"], cache_entry["fitted_for"], cache_entry["params"])
         else:
-            raise ValueError(f"Unknown regression model type: {regression_model_type}")
-
-        # Fit regression kriging
-        X_train = valid_elev.reshape(-1, 1)
-        coords_train = np.c_[x_pts_raster, y_pts_raster]
-        rk = RegressionKriging(
-            regression_model=regression_model,
-            variogram_model=variogram_model,
-            nlags=nlags,
-            n_closest_points=20
+            params = variogram_parameters_dict(
+                variogram_model, krige_model.variogram_model_parameters
+            )
+            entry = None
+            if variogram_cache is not None and variogram_cache.enabled:
+                entry = variogram_cache.put(
+                    regression_model_type, variogram_model, nlags, map_time, station_ids, params
+                )
+            backend_logger.info("Variogram: fitted%s %s",
+                                f" and cached as {entry['id']}" if entry else "", params)
+
+        # Predict only inside the country, cells outside stay NaN
+        X_pred = prediction_grid.inside_features
+        with timed(metrics, "predict"):
+            if len(X_pred):
+                predicted = predict_in_chunks(
+                    regression_model.predict, X_pred, chunk_size
+                ) + krige_residuals(
+                    krige_model, coords_train, prediction_grid, kriging_backend,
+                    chunk_size=chunk_size, coarse_factor=coarse_factor,
+                )
+            else:
+                predicted = np.empty(0)
+        grid_predicted_temp = prediction_grid.scatter(predicted)
+        return grid_x, grid_y, grid_predicted_temp
+
+    except Exception as e:
+        backend_logger.exception("Exception in spatial_interpolation: %s", e)
+        raise
+
+
+def spatial_interpolation_batch(
+    stations,
+    temperatures,
+    rep,
+    geo_proc,
+    elevation_data,
+    transform_matrix,
+    crs,
+    variogram_model='spherical',
+    nlags=40,
+    regression_model_type='linear',
+    grid_x_points=500,
+    grid_y_points=500,
+    prediction_grid=None,
+    kriging_backend=None,
+    variogram_parameters=None,
+    coarse_factor=1,
+    n_jobs=None,
+):
+    """
+    Regression kriging of many hours measured by the same stations.
+    - stations: DataFrame with Longitude, Latitude (one row per station).
+    - temperatures: array (hours, stations) in the same station order.
+    Fits the trend per hour (one multi-output fit for the linear model with
+    shared variogram_parameters). With
+    shared variogram_parameters the kriging systems are solved once and the
+    residuals of all hours are kriged with a single sparse matrix product;
+    without them every hour fits its own variogram and gets its own weights,
+    so each hour matches spatial_interpolation with the same backend.
+    Residuals are kriged on a coarser grid and upsampled when coarse_factor > 1.
+    Returns grid_x, grid_y and a cube of shape (hours,) + grid shape.
+    """
+    temperatures = np.atleast_2d(np.asarray(temperatures, dtype=np.float64))
+    n_hours, n_stations = temperatures.shape
+    backend_logger.info(
+        "spatial_interpolation_batch start (%d hours, %d stations, model=%s, variogram=%s)",
+        n_hours, n_stations, regression_model_type, variogram_model
+    )
+    try:
+        if prediction_grid is None:
+            prediction_grid = PredictionGrid(
+                rep, geo_proc, elevation_data, transform_matrix, crs,
+                x_points=grid_x_points, y_points=grid_y_points,
+            )
+        if kriging_backend is None:
+            kriging_backend = NeighbourCacheKriging()
+
+        if n_stations != len(stations):
+            raise ValueError("temperatures must have one column per station.")
+        if n_stations < 3:
+            raise ValueError("Málo platných měření pro kriging (potřeba alespoň 3).")
+        if not np.isfinite(temperatures).all():
+            raise ValueError("Batch kriging needs a temperature for every station and hour.")
+
+        coords_train, X_train = prediction_grid.station_features(
+            stations['Longitude'].values, stations['Latitude'].values
         )
-        rk.fit(X_train, coords_train, temp)
+        X_pred = prediction_grid.inside_features
 
-        # Prepare grid for prediction
-        to_raster_from_rep = Transformer.from_crs(rep_crs, crs, always_xy=True)
-        grid_x_flat_rep = grid_x.ravel()
-        grid_y_flat_rep = grid_y.ravel()
-        grid_x_raster, grid_y_raster = to_raster_from_rep.transform(grid_x_flat_rep, grid_y_flat_rep)
+        # Trend per hour: residuals (hours, stations), trend on grid (hours, cells).
+        # The multi-output linear fit differs from per-hour fits by rounding only,
+        # which per-hour variogram fits can amplify, so it needs a shared variogram.
+        if regression_model_type == 'linear' and variogram_parameters is not None:
+            model = make_regression_model(regression_model_type, n_jobs=n_jobs).fit(
+                X_train, temperatures.T
+            )
+            residuals = temperatures - model.predict(X_train).T.reshape(n_hours, -1)
+            trend = model.predict(X_pred).T.reshape(n_hours, -1)
+        else:
+            from sklearn.base import clone
+            residuals = np.empty_like(temperatures)
+            trend = np.empty((n_hours, len(X_pred)))
+            base_model = make_regression_model(regression_model_type, n_jobs=n_jobs)
+            for h in range(n_hours):
+                model = clone(base_model).fit(X_train, temperatures[h])
+                residuals[h] = temperatures[h] - model.predict(X_train)
+                trend[h] = model.predict(X_pred)
 
-        grid_rows, grid_cols = rowcol(transform_matrix, grid_x_raster, grid_y_raster)
-        grid_rows = np.clip(np.floor(grid_rows).astype(int), 0, elevation_data.shape[0] - 1)
-        grid_cols = np.clip(np.floor(grid_cols).astype(int), 0, elevation_data.shape[1] - 1)
-        grid_elev = elevation_data[grid_rows, grid_cols]
+        # Shared variogram, or one fitted per hour
+        variogram_function = OrdinaryKriging.variogram_dict[variogram_model]
+        if variogram_parameters is None:
+            hour_params = [
+                list(OrdinaryKriging(
+                    coords_train[:, 0], coords_train[:, 1], residuals[h],
+                    variogram_model=variogram_model, nlags=nlags,
+                ).variogram_model_parameters)
+                for h in range(n_hours)
+            ]
+        else:
+            names = VARIOGRAM_PARAMETER_NAMES[variogram_model]
+            hour_params = [[float(variogram_parameters[name]) for name in names]] * n_hours
+        for h, params in enumerate(hour_params):
+            backend_logger.info("Variogram (batch hour %d/%d): %s", h + 1, n_hours,
+                                variogram_parameters_dict(variogram_model, params))
 
-        if np.isnan(grid_elev).any():
-            mean_elev = np.nanmean(valid_elev)
-            grid_elev = np.nan_to_num(grid_elev, nan=(0.0 if np.isnan(mean_elev) else mean_elev))
+        if coarse_factor > 1:
+            _, _, coords_pred = prediction_grid.coarse(coarse_factor)
+            grid_key = f"{prediction_grid.key}-c{coarse_factor}"
+        else:
+            coords_pred, grid_key = prediction_grid.inside_coords, prediction_grid.key
 
-        X_pred = grid_elev.reshape(-1, 1)
-        coords_pred = np.c_[grid_x_raster, grid_y_raster]
-        grid_predicted_temp = rk.predict(X_pred, coords_pred).reshape(grid_x.shape)
+        # Kriging weights once per distinct variogram, residuals of its hours in one product
+        kriged = np.empty((len(coords_pred), n_hours))
+        groups = {}
+        for h, params in enumerate(hour_params):
+            groups.setdefault(tuple(params), []).append(h)
+        for params, hours in groups.items():
+            weights = kriging_backend.weight_matrix(
+                coords_train, coords_pred, grid_key, variogram_model, variogram_function,
+                list(params),
+            )
+            kriged[:, hours] = weights @ residuals[hours].T
+        if coarse_factor > 1:
+            kriged = prediction_grid.upsample(coarse_factor, kriged)
+        predicted = trend + kriged.T
 
-        grid_predicted_temp = np.where(mask.reshape(grid_x.shape), grid_predicted_temp, np.nan)
-        return grid_x, grid_y, grid_predicted_temp
+        cube = np.full((n_hours, prediction_grid.size), np.nan)
+        cube[:, prediction_grid.inside_idx] = predicted
+        cube = cube.reshape((n_hours,) + prediction_grid.shape)
+        return prediction_grid.grid_x, prediction_grid.grid_y, cube
 
     except Exception as e:
-        backend_logger.exception("Exception in spatial_interpolation: %s", e)
+        backend_logger.exception("Exception in spatial_interpolation_batch: %s", e)
         raise
@@ -0,0 +1,174 @@
+import hashlib
+import numpy as np
+import logging
+from pyproj import Transformer
+from scipy.interpolate import RegularGridInterpolator
+from geo.covariates import CovariateStack
+
+backend_logger = logging.getLogger("backend_logger")
+
+
+class PredictionGrid:
+    """
+    Precomputed geometry of the interpolation grid.
+    Holds the grid over the country bounds, its projection to the raster CRS,
+    DEM pixel indices and elevations, the country mask with flat indices
+    of the in-country cells and the float32 stack of regression covariates
+    at those cells. Built once and reused for every hourly map.
+    """
+
+    def __init__(
+        self,
+        rep,
+        geo_proc,
+        elevation_data,
+        transform_matrix,
+        crs,
+        x_points=500,
+        y_points=500,
+        covariates=("elevation",),
+        tpi_radius=5,
+    ):
+        """
+        Builds the grid for country shape rep (in its own CRS) and DEM
+        elevation_data with transform_matrix in raster CRS crs, with the
+        regression covariates (see geo.covariates) sampled at its cells.
+        """
+        rep_crs = getattr(rep, "crs", None) or "EPSG:4326"
+        bounds = rep.total_bounds
+        self.x_points = x_points
+        self.y_points = y_points
+        self.bounds = tuple(bounds)
+        self._to_raster = Transformer.from_crs(rep_crs, crs, always_xy=True)
+        self._from_wgs = Transformer.from_crs("EPSG:4326", crs, always_xy=True)
+        self._geo_proc = geo_proc
+        self._transform_matrix = transform_matrix
+        self._raster_shape = elevation_data.shape
+        self._coarse = {}
+        self.grid_x, self.grid_y = np.mgrid[
+            bounds[0]:bounds[2]:complex(x_points),
+            bounds[1]:bounds[3]:complex(y_points),
+        ]
+        self.shape = self.grid_x.shape
+
+        # Country mask and flat indices of cells inside it
+        self.mask = geo_proc.create_mask(rep, self.grid_x, self.grid_y)
+        self.inside_idx = np.flatnonzero(self.mask)
+
+        # Grid in raster CRS
+        x_raster, y_raster = self._to_raster.transform(self.grid_x.ravel(), self.grid_y.ravel())
+        self.coords = np.c_[x_raster, y_raster]
+
+        # Covariate stack over the DEM, also provides the shared NaN fill values
+        self.covariates = CovariateStack(
+            elevation_data, transform_matrix, crs, names=covariates, tpi_radius=tpi_radius
+        )
+
+        # DEM pixel indices and elevation, NaN filled with the DEM window mean
+        self.rows, self.cols = geo_proc.raster_indices(
+            transform_matrix, elevation_data.shape, x_raster, y_raster
+        )
+        elevation = np.asarray(elevation_data[self.rows, self.cols], dtype=np.float64)
+        self.elevation = np.nan_to_num(elevation, nan=self.covariates.fill_values["elevation"])
+
+        # Prediction inputs restricted to the country
+        self.inside_coords = self.coords[self.inside_idx]
+        self.inside_elevation = self.elevation[self.inside_idx]
+
+        # Covariates of the in-country cells (cells, covariates) float32
+        if {"lat", "lon"} & set(self.covariates.names):
+            to_wgs = Transformer.from_crs(rep_crs, "EPSG:4326", always_xy=True)
+            lon, lat = to_wgs.transform(
+                self.grid_x.ravel()[self.inside_idx], self.grid_y.ravel()[self.inside_idx]
+            )
+        else:
+            lon = lat = np.zeros(len(self.inside_idx))
+        self.inside_features = self.covariates.sample(
+            self.rows[self.inside_idx], self.cols[self.inside_idx], lon, lat
+        )
+
+        # Identifies the in-country prediction points, e.g. for neighbour caches
+        self.key = hashlib.sha1(
+            np.ascontiguousarray(self.inside_coords).tobytes()
+        ).hexdigest()[:16]
+
+        for arr in (self.grid_x, self.grid_y, self.coords, self.rows, self.cols,
+                    self.elevation, self.inside_idx, self.inside_coords,
+                    self.inside_elevation, self.inside_features):
+            arr.flags.writeable = False
+
+        backend_logger.info(
+            "PredictionGrid: %dx%d cells, %d inside country, covariates %s.",
+            x_points, y_points, len(self.inside_idx), ",".join(self.covariates.names)
+        )
+
+    @property
+    def size(self):
+        """
+        Total number of grid cells.
+        """
+        return self.grid_x.size
+
+    def station_features(self, lon, lat):
+        """
+        Projects station WGS84 coordinates to raster CRS and samples the grid's
+        covariates there, with the same fill values for missing data as the grid.
+        Returns coords (N, 2) and features (N, covariates), float32 values upcast
+        to float64 so the regression is fitted in double precision.
+        """
+        lon = np.asarray(lon, dtype=np.float64)
+        lat = np.asarray(lat, dtype=np.float64)
+        x_raster, y_raster = self._from_wgs.transform(lon, lat)
+        rows, cols = self._geo_proc.raster_indices(
+            self._transform_matrix, self._raster_shape, x_raster, y_raster
+        )
+        features = self.covariates.sample(rows, cols, lon, lat).astype(np.float64)
+        return np.c_[x_raster, y_raster], features
+
+    def scatter(self, values, fill_value=np.nan):
+        """
+        Places values predicted for the in-country cells into a full grid.
+        Cells outside the country are set to fill_value.
+        """
+        grid = np.full(self.size, fill_value, dtype=np.float64)
+        grid[self.inside_idx] = values
+        return grid.reshape(self.shape)
+
+    def coarse(self, factor):
+        """
+        Returns a grid factor-times coarser over the same bounds as
+        (x_axis, y_axis, coords), coords being all its cells in raster CRS.
+        Cached per factor.
+        """
+        cached = self._coarse.get(factor)
+        if cached is not None:
+            return cached
+        nx = max(2, -(-self.x_points // factor))
+        ny = max(2, -(-self.y_points // factor))
+        x_axis = np.linspace(self.bounds[0], self.bounds[2], nx)
+        y_axis = np.linspace(self.bounds[1], self.bounds[3], ny)
+        gx, gy = np.meshgrid(x_axis, y_axis, indexing="ij")
+        x_raster, y_raster = self._to_raster.transform(gx.ravel(), gy.ravel())
+        coords = np.c_[x_raster, y_raster]
+        coords.flags.writeable = False
+        self._coarse[factor] = (x_axis, y_axis, coords)
+        backend_logger.info("PredictionGrid: coarse grid %dx%d (factor %d).", nx, ny, factor)
+        return self._coarse[factor]
+
+    def upsample(self, factor, values):
+        """
+        Bilinearly interpolates values on the coarse grid of factor (flat, or
+        flat with trailing dimensions e.g. hours) to the in-country cells.
+        Returns array of shape (inside cells,) + trailing dimensions.
+        """
+        x_axis, y_axis, _ = self.coarse(factor)
+        values = np.asarray(values, dtype=np.float64)
+        values = values.reshape((len(x_axis), len(y_axis)) + values.shape[1:])
+        interpolator = RegularGridInterpolator((x_axis, y_axis), values)
+        points = np.c_[
+            self.grid_x.ravel()[self.inside_idx], self.grid_y.ravel()[self.inside_idx]
+        ]
+        # Guard against rounding just outside the coarse axes
+        points[:, 0] = np.clip(points[:, 0], x_axis[0], x_axis[-1])
+        points[:, 1] = np.clip(points[:, 1], y_axis[0], y_axis[-1])
+        return interpolator(points)
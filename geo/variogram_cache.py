@@ -0,0 +1,104 @@
+import hashlib
+import logging
+import pandas as pd
+
+backend_logger = logging.getLogger("backend_logger")
+
+# Parameter names in the order pykrige stores them in variogram_model_parameters
+VARIOGRAM_PARAMETER_NAMES = {
+    "linear": ("slope", "nugget"),
+    "power": ("scale", "exponent", "nugget"),
+    "gaussian": ("psill", "range", "nugget"),
+    "spherical": ("psill", "range", "nugget"),
+    "exponential": ("psill", "range", "nugget"),
+    "hole-effect": ("psill", "range", "nugget"),
+}
+
+
+def variogram_parameters_dict(variogram_model, parameters):
+    """
+    Converts pykrige's fitted parameter list to the dict accepted by
+    OrdinaryKriging(variogram_parameters=...).
+    """
+    names = VARIOGRAM_PARAMETER_NAMES[variogram_model]
+    return {name: float(value) for name, value in zip(names, parameters)}
+
+
+class VariogramCache:
+    """
+    Keeps fitted variogram parameters for reuse in following hours.
+    Modes:
+    - off: every map fits its own variogram,
+    - hour_of_day: one parameter set per model and hour of day,
+    - rolling: one parameter set per model, replaced on every refit.
+    A cached set is reused only while it is at most max_age_hours old (relative
+    to the map time) and the station set overlaps it by at least min_overlap
+    (Jaccard index); otherwise the variogram is refitted and stored.
+    """
+
+    MODES = ("off", "hour_of_day", "rolling")
+
+    def __init__(self, mode="off", max_age_hours=24, min_overlap=0.9):
+        """
+        Initializes an empty cache.
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown variogram cache mode: {mode}")
+        self.mode = mode
+        self.max_age = pd.Timedelta(hours=max_age_hours)
+        self.min_overlap = min_overlap
+        self._entries = {}
+
+    @property
+    def enabled(self):
+        """
+        True when parameters are cached.
+        """
+        return self.mode != "off"
+
+    def _key(self, regression_model, variogram_model, nlags, map_time):
+        """
+        Returns the cache slot for a model configuration and map time.
+        """
+        slot = pd.Timestamp(map_time).hour if self.mode == "hour_of_day" else None
+        return (regression_model, variogram_model, nlags, slot)
+
+    def get(self, regression_model, variogram_model, nlags, map_time, station_ids):
+        """
+        Returns the cached entry usable for this map, or None when a refit is needed.
+        Entry keys: id, params, fitted_for, stations.
+        """
+        if not self.enabled:
+            return None
+        entry = self._entries.get(self._key(regression_model, variogram_model, nlags, map_time))
+        if entry is None:
+            return None
+
+        if abs(pd.Timestamp(map_time) - entry["fitted_for"]) > self.max_age:
+            return None
+        stations = frozenset(station_ids)
+        union = len(stations | entry["stations"])
+        overlap = len(stations & entry["stations"]) / union if union else 0.0
+        if overlap < self.min_overlap:
+            return None
+        return entry
+
+    def put(self, regression_model, variogram_model, nlags, map_time, station_ids, params):
+        """
+        Stores parameters fitted for map_time and returns the new entry.
+        """
+        if not self.enabled:
+            return None
+        key = self._key(regression_model, variogram_model, nlags, map_time)
+        fitted_for = pd.Timestamp(map_time)
+        digest = hashlib.sha1(
+            repr((key, fitted_for.isoformat(), sorted(params.items()))).encode("utf-8")
+        ).hexdigest()[:10]
+        entry = {
+            "id": f"vg-{digest}",
+            "params": dict(params),
+            "fitted_for": fitted_for,
+            "stations": frozenset(station_ids),
+        }
+        self._entries[key] = entry
+        return entry
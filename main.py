@@ -1,14 +1,6 @@
 import datetime
-from data.calculation_engine import CalculationEngine
-from core.log import LoggerManager
-from core.config import AppConfig
 import argparse
 
-config = AppConfig()
-logging_config = config.get_logging_config()
-logger_manager = LoggerManager(config)
-backend_logger = logger_manager.get_logger("backend_logger")
-
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run data processing.")
@@ -28,8 +20,22 @@ if __name__ == "__main__":
         type=str,
         help="Comma-separated list of Weatherstations to include in processing.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes for --first_run and --start_time/--end_time ranges.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Recompute hours even if their outputs are up to date in the output manifest.",
+    )
     args = parser.parse_args()
 
+    if args.workers < 1:
+        parser.error("--workers must be at least 1.")
+
     if args.stations and (not args.start_time or not args.end_time):
         parser.error(
             "--stations can only be used when both --start_time and --end_time are specified."
@@ -51,11 +57,22 @@ if __name__ == "__main__":
         else None
     )
 
+    # Heavy modules (pandas, geo stack, kriging) are imported only after
+    # arguments are valid, so --help and usage errors return immediately
+    from core.config import AppConfig
+    from core.log import LoggerManager
+    from data.calculation_engine import CalculationEngine
+
+    config = AppConfig()
+    logger_manager = LoggerManager(config)
+    backend_logger = logger_manager.get_logger("backend_logger")
+
     backend_logger.info("Backend processing started")
-    processor = CalculationEngine(config, logger_manager)
+    processor = CalculationEngine(config, logger_manager, force=args.force)
     processor.data_processing_loop(
         first_run=args.first_run,
         start_time=start_time,  
         end_time=end_time,      
         stations=stations,       
+        workers=args.workers,
     )
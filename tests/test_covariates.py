@@ -0,0 +1,78 @@
+import numpy as np
+import geopandas as gpd
+import pytest
+from pyproj import Transformer
+from rasterio.transform import from_origin
+from shapely.geometry import Polygon
+
+from geo.geographical_processing import GeographicalProcessing
+from geo.prediction_grid import PredictionGrid
+
+
+@pytest.fixture(scope="module")
+def terrain():
+    """
+    Synthetic hilly DEM in EPSG:4326 over Czechia and a country polygon in EPSG:3857.
+    """
+    rows, cols = np.mgrid[0:400, 0:700]
+    dem = (400 + 250 * np.sin(cols / 40) * np.cos(rows / 30)).astype(np.float32)
+    transform_matrix = from_origin(11.5, 51.5, 0.01, 0.01)
+    rep = gpd.GeoDataFrame(
+        geometry=[Polygon([(12.2, 48.7), (18.6, 48.7), (18.4, 50.9), (12.4, 50.8)])],
+        crs="EPSG:4326",
+    ).to_crs("EPSG:3857")
+    return rep, dem, transform_matrix
+
+
+@pytest.mark.parametrize("covariates", [
+    ("slope", "northness", "eastness"),
+    ("elevation", "lat", "lon", "slope", "northness", "eastness", "tpi"),
+])
+def test_station_on_grid_cell_gets_grid_features(terrain, covariates):
+    rep, dem, transform_matrix = terrain
+    grid = PredictionGrid(
+        rep, GeographicalProcessing(), dem, transform_matrix, "EPSG:4326",
+        x_points=40, y_points=30, covariates=covariates,
+    )
+    to_wgs = Transformer.from_crs(rep.crs, "EPSG:4326", always_xy=True)
+    cells = grid.inside_idx[:: max(1, len(grid.inside_idx) // 25)]
+    lon, lat = to_wgs.transform(grid.grid_x.ravel()[cells], grid.grid_y.ravel()[cells])
+
+    _, features = grid.station_features(lon, lat)
+
+    expected = grid.inside_features[np.searchsorted(grid.inside_idx, cells)]
+    np.testing.assert_array_equal(features, expected)
+    assert np.abs(features).sum() > 0
+
+
+def test_missing_dem_values_get_the_same_fill_for_grid_and_stations(terrain):
+    rep, dem, transform_matrix = terrain
+    dem = dem.copy()
+    dem[150:250, 250:450] = np.nan
+    covariates = ("elevation", "slope", "northness", "eastness", "tpi")
+    grid = PredictionGrid(
+        rep, GeographicalProcessing(), dem, transform_matrix, "EPSG:4326",
+        x_points=40, y_points=30, covariates=covariates,
+    )
+    to_wgs = Transformer.from_crs(rep.crs, "EPSG:4326", always_xy=True)
+    lon, lat = to_wgs.transform(
+        grid.grid_x.ravel()[grid.inside_idx], grid.grid_y.ravel()[grid.inside_idx]
+    )
+    cells = np.flatnonzero(np.isnan(dem[grid.rows[grid.inside_idx], grid.cols[grid.inside_idx]]))
+    assert len(cells) > 0
+
+    # A single station on a missing pixel must not be filled from its own sample
+    for cell in cells[:5]:
+        _, features = grid.station_features(lon[cell:cell + 1], lat[cell:cell + 1])
+        np.testing.assert_array_equal(features[0], grid.inside_features[cell])
+
+
+def test_default_covariates_are_grid_elevation(terrain):
+    rep, dem, transform_matrix = terrain
+    grid = PredictionGrid(
+        rep, GeographicalProcessing(), dem, transform_matrix, "EPSG:4326",
+        x_points=40, y_points=30,
+    )
+    assert grid.inside_features.shape == (len(grid.inside_idx), 1)
+    assert grid.inside_features.dtype == np.float32
+    np.testing.assert_array_equal(grid.inside_features[:, 0], grid.inside_elevation)
@@ -0,0 +1,134 @@
+import os
+import json
+import math
+import logging
+import numpy as np
+from pyproj import CRS
+from visualization.visualization import (
+    DEFAULT_COLORMAP,
+    color_limits,
+    colormap_lut,
+    quantize,
+    encode_png,
+)
+
+backend_logger = logging.getLogger("backend_logger")
+
+# Half of the EPSG:3857 world extent in metres
+WEB_MERCATOR_EXTENT = 20037508.342789244
+TILE_SIZE = 256
+
+
+def tile_range(bounds, zoom):
+    """
+    Returns (x_min, x_max, y_min, y_max) XYZ tile indices (inclusive)
+    covering EPSG:3857 bounds (min_x, min_y, max_x, max_y) at zoom.
+    """
+    n = 2 ** zoom
+    span = 2 * WEB_MERCATOR_EXTENT / n
+
+    def to_index(value, origin, sign):
+        return min(n - 1, max(0, int(math.floor(sign * (value - origin) / span))))
+
+    return (
+        to_index(bounds[0], -WEB_MERCATOR_EXTENT, 1),
+        to_index(bounds[2], -WEB_MERCATOR_EXTENT, 1),
+        to_index(bounds[3], WEB_MERCATOR_EXTENT, -1),
+        to_index(bounds[1], WEB_MERCATOR_EXTENT, -1),
+    )
+
+
+def _cell_index(centers, origin, step, count):
+    """
+    Returns indices of the nearest grid cells for pixel centers;
+    pixels outside the grid get index count (the padding cell).
+    """
+    idx = np.rint((centers - origin) / step).astype(np.int64)
+    idx[(idx < 0) | (idx >= count)] = count
+    return idx
+
+
+def render_tiles(grid_x, grid_y, grid_z, crs, hour_name, config):
+    """
+    Cuts the grid into an XYZ tile pyramid <tiles_dir>/<hour_name>/<z>/<x>/<y>.png.
+    - Grid must be in EPSG:3857 (czech_rep CRS); pixels take the nearest cell.
+    - Zoom levels [output] tile_min_zoom..tile_max_zoom; all-NaN tiles are skipped.
+    - Same colors and color scale as map_plotting; vmin, vmax and zooms are
+      written to <hour_name>/tiles.json.
+    - Tiles whose bytes did not change are not rewritten.
+    Returns path of tiles.json.
+    """
+    if CRS.from_user_input(crs).to_epsg() != 3857:
+        raise ValueError(f"Tiles need a grid in EPSG:3857, got {crs}.")
+
+    output_config = config.get_output_config()
+    visualization_config = config.get_visualization()
+    n_levels = visualization_config["n_levels"]
+    palette = colormap_lut(visualization_config["colormap"] or DEFAULT_COLORMAP, n_levels)
+    zooms = range(output_config["tile_min_zoom"], output_config["tile_max_zoom"] + 1)
+    hour_dir = os.path.join(config.get_paths()["tiles_dir"], hour_name)
+
+    vmin, vmax = color_limits(grid_z)
+    nx, ny = grid_z.shape
+    x0, y0 = grid_x[0, 0], grid_y[0, 0]
+    dx = (grid_x[-1, 0] - x0) / (nx - 1)
+    dy = (grid_y[0, -1] - y0) / (ny - 1)
+    bounds = (x0 - dx / 2, y0 - dy / 2, grid_x[-1, 0] + dx / 2, grid_y[0, -1] + dy / 2)
+
+    # Color indices padded with one transparent row and column for outside pixels
+    indices = np.full((nx + 1, ny + 1), n_levels, dtype=np.uint8)
+    indices[:nx, :ny] = quantize(grid_z, vmin, vmax, n_levels)
+
+    stats = {"written": 0, "unchanged": 0, "empty": 0}
+    offsets = np.arange(TILE_SIZE) + 0.5
+    for zoom in zooms:
+        res = 2 * WEB_MERCATOR_EXTENT / (TILE_SIZE * 2 ** zoom)
+        tx_min, tx_max, ty_min, ty_max = tile_range(bounds, zoom)
+        for tx in range(tx_min, tx_max + 1):
+            xs = -WEB_MERCATOR_EXTENT + (tx * TILE_SIZE + offsets) * res
+            ci = _cell_index(xs, x0, dx, nx)
+            for ty in range(ty_min, ty_max + 1):
+                ys = WEB_MERCATOR_EXTENT - (ty * TILE_SIZE + offsets) * res
+                ri = _cell_index(ys, y0, dy, ny)
+                tile = indices[np.ix_(ci, ri)].T  # rows north to south
+                if (tile == n_levels).all():
+                    stats["empty"] += 1
+                    continue
+                path = os.path.join(hour_dir, str(zoom), str(tx), f"{ty}.png")
+                if _write_if_changed(path, encode_png(np.ascontiguousarray(tile), palette)):
+                    stats["written"] += 1
+                else:
+                    stats["unchanged"] += 1
+
+    meta_path = os.path.join(hour_dir, "tiles.json")
+    meta = {
+        "vmin": vmin,
+        "vmax": vmax,
+        "min_zoom": zooms.start,
+        "max_zoom": zooms.stop - 1,
+        "bounds": [float(b) for b in bounds],
+        "crs": "EPSG:3857",
+    }
+    _write_if_changed(meta_path, json.dumps(meta, indent=2).encode("utf-8"))
+    backend_logger.info(
+        f"Tiles {hour_name}: {stats['written']} written, {stats['unchanged']} unchanged, "
+        f"{stats['empty']} empty skipped."
+    )
+    return meta_path
+
+
+def _write_if_changed(path, data):
+    """
+    Atomically writes data to path unless the file already has the same bytes.
+    Returns True when the file was written.
+    """
+    if os.path.exists(path) and os.path.getsize(path) == len(data):
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
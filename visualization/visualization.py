@@ -1,12 +1,32 @@
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
 import numpy as np
 import os
+import struct
+import zlib
 import logging
 
 backend_logger = logging.getLogger("backend_logger")
 
 
+# Default colormap if not provided in config
+DEFAULT_COLORMAP = [
+    (0, "#4E00A6"),
+    (1 / 14, "#3600D0"),
+    (2 / 14, "#1107F4"),
+    (3 / 14, "#0032F7"),
+    (4 / 14, "#0467FF"),
+    (5 / 14, "#04A3FF"),
+    (6 / 14, "#04D27F"),
+    (7 / 14, "#1BEC38"),
+    (8 / 14, "#63FF00"),
+    (9 / 14, "#F4FB0D"),
+    (10 / 14, "#FBE316"),
+    (11 / 14, "#F7C41B"),
+    (12 / 14, "#FC871D"),
+    (13 / 14, "#DB4F08"),
+    (1, "#A00000"),
+]
+
+
 def map_plotting(
     grid_x, grid_y, grid_z, czech_rep, image_name, config, show_boundary=False
 ):
@@ -15,31 +35,21 @@ def map_plotting(
     - Uses custom colormap and levels from config.
     - Optionally draws country boundary.
     - Automatically sets color scale based on median value.
-    - Saves image to configured directory.
+    - Saves image to [paths] images_dir.
+    With [visualization] renderer=fast (and no boundary) the grid is written
+    directly by render_png, otherwise through a matplotlib figure.
+    Returns path of the saved image.
     """
     visualization_config = config.get_visualization()
     n_levels = visualization_config["n_levels"]
-    colormap = visualization_config["colormap"]
-
-    # Default colormap if not provided in config
-    if not colormap:
-        colormap = [
-            (0, "#4E00A6"),
-            (1 / 14, "#3600D0"),
-            (2 / 14, "#1107F4"),
-            (3 / 14, "#0032F7"),
-            (4 / 14, "#0467FF"),
-            (5 / 14, "#04A3FF"),
-            (6 / 14, "#04D27F"),
-            (7 / 14, "#1BEC38"),
-            (8 / 14, "#63FF00"),
-            (9 / 14, "#F4FB0D"),
-            (10 / 14, "#FBE316"),
-            (11 / 14, "#F7C41B"),
-            (12 / 14, "#FC871D"),
-            (13 / 14, "#DB4F08"),
-            (1, "#A00000"),
-        ]
+    colormap = visualization_config["colormap"] or DEFAULT_COLORMAP
+
+    if visualization_config["renderer"] == "fast" and not show_boundary:
+        return render_png(grid_z, image_name, config)
+
+    # matplotlib is imported only when this renderer is used
+    import matplotlib.pyplot as plt
+    import matplotlib.colors as mcolors
 
     backend_logger.info("map_plotting: %s", image_name)
     try:
@@ -48,9 +58,7 @@ def map_plotting(
         )
 
         # Set color scale based on median value
-        median_value = np.nanmedian(grid_z) - 2
-        vmin = int(median_value) - 7
-        vmax = int(median_value) + 7
+        vmin, vmax = color_limits(grid_z)
 
         fig, ax = plt.subplots(figsize=(8, 4), frameon=False)
         c = ax.pcolormesh(
@@ -67,10 +75,7 @@ def map_plotting(
             czech_rep.boundary.plot(ax=ax, linewidth=1, color="black")
         ax.set_axis_off()
 
-        save_dir = visualization_config.get("images_dir", "outputs_web")
-        os.makedirs(save_dir, exist_ok=True)
-        base_name, ext = os.path.splitext(image_name)
-        save_path = os.path.join(save_dir, f"{base_name}_{vmin}_{vmax}{ext}")
+        save_path = image_path(config.get_paths()["images_dir"], image_name, vmin, vmax)
 
         plt.savefig(
             save_path,
@@ -82,6 +87,124 @@ def map_plotting(
         )
         plt.close(fig)
         backend_logger.info("Plot saved: %s", save_path)
+        return save_path
     except Exception as e:
         backend_logger.exception("Exception in map_plotting: %s", e)
         raise
+
+
+def color_limits(grid_z):
+    """
+    Returns color scale (vmin, vmax) based on the median value of grid_z.
+    """
+    median_value = np.nanmedian(grid_z) - 2
+    return int(median_value) - 7, int(median_value) + 7
+
+
+def image_path(images_dir, image_name, vmin, vmax):
+    """
+    Returns the output path <images_dir>/<name>_<vmin>_<vmax>.png and creates the directory.
+    """
+    os.makedirs(images_dir, exist_ok=True)
+    base_name, ext = os.path.splitext(image_name)
+    return os.path.join(images_dir, f"{base_name}_{vmin}_{vmax}{ext}")
+
+
+_lut_cache = {}
+
+
+def colormap_lut(colormap, n_levels):
+    """
+    Returns RGBA palette (n_levels + 1, 4) uint8 of the colormap with
+    n_levels discrete colors; the last entry is transparent (for NaN).
+    """
+    key = (repr(colormap), n_levels)
+    lut = _lut_cache.get(key)
+    if lut is None:
+        import matplotlib.colors as mcolors
+
+        cmap = mcolors.LinearSegmentedColormap.from_list(
+            "custom_colormap", colormap, N=n_levels
+        )
+        lut = np.zeros((n_levels + 1, 4), dtype=np.uint8)
+        lut[:n_levels] = cmap(np.arange(n_levels), bytes=True)
+        _lut_cache[key] = lut
+    return lut
+
+
+def quantize(grid_z, vmin, vmax, n_levels):
+    """
+    Maps values to color indices 0..n_levels-1 the same way as matplotlib's
+    Normalize + Colormap (values outside [vmin, vmax] get the end colors);
+    NaN gets index n_levels.
+    """
+    z = np.asarray(grid_z, dtype=np.float64)
+    scaled = (z - vmin) * (n_levels / (vmax - vmin))
+    idx = np.clip(np.floor(np.nan_to_num(scaled, nan=0.0)), 0, n_levels - 1).astype(np.uint8)
+    idx[np.isnan(z)] = n_levels
+    return idx
+
+
+def encode_png(indices, palette):
+    """
+    Encodes a palette PNG (8-bit indices, RGBA palette with tRNS) using zlib.
+    Returns the PNG bytes.
+    """
+    height, width = indices.shape
+    raw = np.zeros((height, width + 1), dtype=np.uint8)  # filter byte 0 per row
+    raw[:, 1:] = indices
+
+    def chunk(tag, data):
+        body = tag + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+    return b"".join([
+        b"\x89PNG\r\n\x1a\n",
+        chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0)),
+        chunk(b"PLTE", palette[:, :3].tobytes()),
+        chunk(b"tRNS", palette[:, 3].tobytes()),
+        chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)),
+        chunk(b"IEND", b""),
+    ])
+
+
+def write_png(path, indices, palette):
+    """
+    Writes a palette PNG atomically.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode_png(indices, palette))
+    os.replace(tmp_path, path)
+
+
+def render_png(grid_z, image_name, config):
+    """
+    Renders the grid directly to a transparent palette PNG without matplotlib.
+    - Same colors, color scale and file naming as map_plotting.
+    - One pixel per grid cell (north up), upscaled by [visualization] png_scale.
+    - NaN cells are transparent.
+    Returns path of the saved image.
+    """
+    visualization_config = config.get_visualization()
+    n_levels = visualization_config["n_levels"]
+    colormap = visualization_config["colormap"] or DEFAULT_COLORMAP
+    if not 1 <= n_levels <= 255:
+        raise ValueError("Fast renderer supports 1-255 color levels.")
+
+    backend_logger.info("render_png: %s", image_name)
+    try:
+        vmin, vmax = color_limits(grid_z)
+        # grid_z[i, j] is at (x_i, y_j): transpose to rows and put north up
+        indices = quantize(grid_z, vmin, vmax, n_levels).T[::-1]
+        scale = visualization_config["png_scale"]
+        if scale > 1:
+            indices = np.repeat(np.repeat(indices, scale, axis=0), scale, axis=1)
+
+        save_path = image_path(config.get_paths()["images_dir"], image_name, vmin, vmax)
+        write_png(save_path, np.ascontiguousarray(indices), colormap_lut(colormap, n_levels))
+        backend_logger.info("Plot saved: %s", save_path)
+        return save_path
+    except Exception as e:
+        backend_logger.exception("Exception in render_png: %s", e)
+        raise